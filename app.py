@@ -1,65 +1,199 @@
-from flask import Flask, jsonify, send_file, request
+from flask import Flask, jsonify, send_file, request, Response, stream_with_context
 from flask_cors import CORS
-import pandas as pd
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
-from stock_codes import stock_codes
-from stockAnalyzer import analyze_stocks_with_combined_logic
-from korea_stock_downloader import fetch_yahoo_finance_data
-from upload_korea_stock_data import connect_to_db, upload_data_to_db
 import zipfile
 import io
+from signal_changes import ChangeLog, read_result_rows, read_result_actions, diff_results, diff_result_file, format_sse
+from data_snapshots import GENERATION_PREFIX, current_generation, begin_generation, commit_generation, discard_generation
+from singleflight import SingleFlight, TTLCache, RateLimiter
+from result_artifacts import FORMATS, load_latest_manifest, is_manifest_current, select_variant
 
-from fastapi import Request, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from jose import jwt, JWTError, ExpiredSignatureError
-from datetime import datetime, timedelta
+# pandas/yfinance/stockAnalyzer 등 무거운 파이프라인 모듈은 /update-stocks 최초 호출 시 로드
+# (다운로드만 제공하는 인스턴스의 콜드 스타트 시간과 메모리 절약)
 
 app = Flask(__name__)
 
+# 신뢰하는 리버스 프록시 수 (0 이면 X-Forwarded-For 를 무시하고 접속 주소를 그대로 사용)
+TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", 0))
+if TRUSTED_PROXY_COUNT > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
+
 # CORS 설정
 CORS(app, resources={r"/*": {"origins": ["http://localhost:3000", "http://localhost:8080", "https://stock-signal-six.vercel.app"]}})
 
-# 프로젝트의 루트 디렉토리를 기준으로 설정
+# 프로젝트의 루트 디렉토리를 기준으로 설정 (STOCK_DATA_DIR 로 데이터 위치 변경 가능)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-OUTPUT_FOLDER = os.path.join(BASE_DIR, "korea_stocks_data_parts")
-OUTPUT_CSV = os.path.join(BASE_DIR, "korea_analysis_combined.csv")
+DATA_DIR = os.environ.get("STOCK_DATA_DIR", BASE_DIR)
+OUTPUT_FOLDER = os.path.join(DATA_DIR, "korea_stocks_data_parts")  # 스냅샷(gen-*)과 current 포인터가 위치하는 루트
+OUTPUT_CSV = os.path.join(DATA_DIR, "korea_analysis_combined.csv")
+ARTIFACT_DIR = os.path.join(DATA_DIR, "korea_analysis_artifacts")  # 버전별 CSV/JSON/Arrow 및 압축본
 
-SECRET_KEY = os.environ["SECRET_KEY"]  # 필수 환경변수, 없으면 KeyError 발생
+SECRET_KEY = os.environ.get("SECRET_KEY")
 ALGORITHM = os.environ.get("ALGORITHM", "HS256")  # 선택적 환경변수
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ["ACCESS_TOKEN_EXPIRE_MINUTES"])  # 필수
-VALID_PASSWORD = os.environ["VALID_PASSWORD"]  # 필수
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+VALID_PASSWORD = os.environ.get("VALID_PASSWORD")
+LEAN_MODE = os.environ.get("LEAN_MODE", "0") == "1"  # 메모리 절약 분석 모드
+MULTI_SCALE_LEVELS = os.environ.get("MULTI_SCALE_LEVELS", "0") == "1"  # 스케일별 지지/저항선 컬럼 추가
+READ_ONLY = os.environ.get("READ_ONLY", "0") == "1"  # 다운로드 전용 모드 (파이프라인 비활성화)
+STREAMING_ANALYSIS = os.environ.get("STREAMING_ANALYSIS", "0") == "1"  # 대규모 종목용 일정 메모리 분석/비교
+
+# 분석 실행마다 Action 이 바뀐 종목만 보관하는 변경 로그
+CHANGE_LOG = ChangeLog(max_versions=int(os.environ.get("CHANGE_LOG_SIZE", 100)))
+SSE_KEEPALIVE_SECONDS = 15
+
+# 무거운 엔드포인트(zip 생성, 파이프라인 실행)의 동시 요청 병합/캐시/클라이언트별 요청 제한
+SINGLE_FLIGHT = SingleFlight()
+FOLDER_ZIP_CACHE = TTLCache(ttl_seconds=int(os.environ.get("FOLDER_ZIP_CACHE_TTL", 60)))
+UPDATE_RESULT_CACHE = TTLCache(ttl_seconds=int(os.environ.get("UPDATE_RESULT_CACHE_TTL", 60)))
+HEAVY_ROUTE_LIMITER = RateLimiter(
+    rate_per_minute=int(os.environ.get("HEAVY_ROUTE_RATE_PER_MINUTE", 30)),
+    burst=int(os.environ.get("HEAVY_ROUTE_BURST", 5)),
+)
+
+for _name in ("SECRET_KEY", "VALID_PASSWORD"):
+    if not os.environ.get(_name):
+        print(f"경고: 환경변수 {_name} 가 설정되지 않았습니다.")
+
+
+def load_pipeline():
+    """
+    데이터 다운로드/분석 모듈을 처음 사용할 때 import 합니다.
+    """
+    from stock_codes import load_stock_codes
+    from korea_stock_downloader import fetch_yahoo_finance_data
+    from stockAnalyzer import analyze_stocks_with_combined_logic, analyze_stocks_streaming
+    analyze = analyze_stocks_streaming if STREAMING_ANALYSIS else analyze_stocks_with_combined_logic
+    return load_stock_codes(), fetch_yahoo_finance_data, analyze
 
 @app.route("/")
 def home():
     return jsonify({"message": "Welcome to the stock API sample project!"})
 
-@app.route("/update-stocks", methods=["POST"])
-def update_all_stocks():
+def client_key():
+    # 클라이언트가 보낸 X-Forwarded-For 는 위조할 수 있으므로 사용하지 않음
+    # (신뢰하는 프록시 뒤에서는 ProxyFix 가 remote_addr 를 실제 클라이언트 주소로 바꿔 줌)
+    return request.remote_addr or "unknown"
+
+def rate_limited():
+    allowed, retry_after = HEAVY_ROUTE_LIMITER.allow(client_key())
+    if allowed:
+        return None
+    response = jsonify({"success": False, "message": "Too many requests"})
+    response.headers["Retry-After"] = str(int(retry_after) + 1)
+    return response, 429
+
+def run_update_pipeline():
+    """
+    다운로드 → 스냅샷 교체 → 분석 → 변경 로그 게시를 실행하고 (응답 본문, 상태 코드)를 반환합니다.
+    """
     try:
-        # 2. 주식 데이터 다운로드
-        fetch_yahoo_finance_data(stock_codes, OUTPUT_FOLDER)
-        
-        # 3. 주식 데이터 분석
-        analyze_stocks_with_combined_logic(OUTPUT_FOLDER, OUTPUT_CSV)
-        
-        return jsonify({"message": "All stock data updated successfully!"})
-    except HTTPException as e:
-        # 인증 실패 시 에러 반환
-        return jsonify({"error": e.detail}), e.status_code
+        # 1. 파이프라인 모듈 로드
+        stock_codes, fetch_yahoo_finance_data, analyze_stocks = load_pipeline()
+
+        # 2. 주식 데이터 다운로드 (새로 마감된 세션만, 새 스냅샷에 저장)
+        generation = begin_generation(OUTPUT_FOLDER)
+        try:
+            summary = fetch_yahoo_finance_data(stock_codes, generation)
+        except Exception:
+            discard_generation(generation)
+            raise
+
+        # 새 데이터가 없으면 스냅샷 폐기 및 분석 재실행 생략
+        if not summary["updated"]:
+            discard_generation(generation)
+            if os.path.exists(OUTPUT_CSV):
+                return {"message": "No new trading session. Stock data is up to date.", "summary": summary}, 200
+        else:
+            # 읽는 쪽은 이전 스냅샷을 계속 사용하다가 포인터 교체 후 새 스냅샷을 사용
+            commit_generation(OUTPUT_FOLDER, generation)
+
+        # 3. 주식 데이터 분석 (이전 결과와 비교해 변경된 종목만 변경 로그에 게시)
+        # 스트리밍 모드에서는 이전 결과의 Action 만 보관하고 새 결과는 한 행씩 읽어 비교
+        previous = read_result_actions(OUTPUT_CSV) if STREAMING_ANALYSIS else read_result_rows(OUTPUT_CSV)
+        analyze_stocks(current_generation(OUTPUT_FOLDER), OUTPUT_CSV, lean=LEAN_MODE, multi_scale=MULTI_SCALE_LEVELS,
+                       artifact_dir=ARTIFACT_DIR)
+        if STREAMING_ANALYSIS:
+            changes = diff_result_file(previous, OUTPUT_CSV)
+        else:
+            changes = diff_results(previous, read_result_rows(OUTPUT_CSV))
+        version = CHANGE_LOG.publish(changes) if changes else CHANGE_LOG.version
+
+        return {"message": "All stock data updated successfully!", "summary": summary,
+                "version": version, "changed": len(changes)}, 200
     except Exception as e:
         # 기타 에러 처리
-        return jsonify({"error": f"Failed to update stocks: {str(e)}"}), 500
+        return {"error": f"Failed to update stocks: {str(e)}"}, 500
+
+@app.route("/update-stocks", methods=["POST"])
+def update_all_stocks():
+    if READ_ONLY:
+        return jsonify({"error": "Read-only mode: stock updates are disabled on this instance."}), 403
+
+    limited = rate_limited()
+    if limited:
+        return limited
+
+    # 동시에 들어온 요청(스케줄러 중복 실행 등)은 실행 중인 파이프라인 결과를 공유하고,
+    # 직후에 들어온 요청은 캐시된 결과를 받음 (실패 결과는 캐시하지 않음)
+    def run():
+        body, status = run_update_pipeline()
+        if status == 200:
+            UPDATE_RESULT_CACHE.set("update-stocks", (body, status))
+        return body, status
+
+    cached = UPDATE_RESULT_CACHE.get("update-stocks")
+    body, status = cached if cached is not None else SINGLE_FLIGHT.do("update-stocks", run)
+    return jsonify(body), status
 
 @app.route('/download/korea-analysis-combined', methods=['GET'])
 def download_korea_analysis_combined():
     try:
-        # 상위 디렉토리에 위치한 파일 경로
-        file_path = os.path.join(os.getcwd(), "korea_analysis_combined.csv")
+        # 미리 만들어 둔 아티팩트가 있으면 요청 형식/인코딩에 맞는 파일을 그대로 전송 (요청마다 압축하지 않음)
+        manifest = load_latest_manifest(ARTIFACT_DIR)
+        fmt = request.args.get("format", "csv").lower()
+
+        if fmt not in FORMATS:
+            return jsonify({"success": False, "message": f"Unsupported format: {fmt}"}), 400
+
+        # 아티팩트 없이 CSV 만 다시 쓰인 경우(스트리밍 분석, 샤드 병합 등) 오래된 아티팩트는 사용하지 않음
+        if manifest is not None and not is_manifest_current(manifest, OUTPUT_CSV):
+            manifest = None
+
+        if manifest is not None:
+            if fmt not in manifest["formats"]:
+                return jsonify({"success": False, "message": f"Format not available: {fmt}"}), 404
+            selected = select_variant(manifest, fmt, request.headers.get("Accept-Encoding"))
+            if selected is None:
+                return jsonify({"success": False, "message": f"No acceptable encoding for format: {fmt}"}), 406
+            encoding, variant = selected
+
+            if request.if_none_match.contains(variant["etag"]):
+                response = app.response_class(status=304)
+            else:
+                response = send_file(
+                    os.path.join(ARTIFACT_DIR, manifest["version"], variant["file"]),
+                    mimetype=manifest["formats"][fmt]["mimetype"],
+                    as_attachment=True,
+                    download_name=f"korea_analysis_combined.{FORMATS[fmt]['extension']}",
+                    etag=False,
+                    conditional=False,
+                )
+                if encoding != "identity":
+                    response.headers["Content-Encoding"] = encoding
+            response.set_etag(variant["etag"])
+            response.headers["Vary"] = "Accept-Encoding"
+            response.headers["Cache-Control"] = "no-cache"
+            response.headers["X-Artifact-Version"] = manifest["version"]
+            return response
+
+        # 아티팩트가 없으면 기존 CSV 파일 전송
+        if fmt != "csv":
+            return jsonify({"success": False, "message": "File not found"}), 404
 
         # 파일이 존재하는지 확인
-        if os.path.exists(file_path):
-            return send_file(file_path, as_attachment=True)
+        if os.path.exists(OUTPUT_CSV):
+            return send_file(OUTPUT_CSV, as_attachment=True)
         else:
             # 파일이 없으면 JSON 응답
             return jsonify({"success": False, "message": "File not found"}), 404
@@ -67,30 +201,42 @@ def download_korea_analysis_combined():
         # 오류 발생 시 JSON 응답
         return jsonify({"success": False, "message": str(e)}), 500
 
+def build_folder_zip(folder_path):
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for root, dirs, files in os.walk(folder_path):
+            # 스냅샷 도입 전 폴더 구조에서 작성 중인 스냅샷은 제외
+            dirs[:] = [d for d in dirs if not d.startswith(GENERATION_PREFIX)]
+            for file in files:
+                if file.endswith(".tmp"):
+                    continue
+                file_path = os.path.join(root, file)
+                arcname = os.path.relpath(file_path, folder_path)  # 폴더 구조 유지
+                zip_file.write(file_path, arcname)
+    return zip_buffer.getvalue()
+
 @app.route('/download/folder', methods=['GET'])
 def download_folder():
     try:
-        # 폴더 경로 설정
-        folder_path = os.path.join(os.getcwd(), "korea_stocks_data_parts")
+        # 폴더 경로 설정 (현재 스냅샷)
+        folder_path = current_generation(OUTPUT_FOLDER)
 
         # 폴더 존재 여부 확인
         if not os.path.exists(folder_path):
             return jsonify({"success": False, "message": "Folder not found"}), 404
 
-        # 압축 파일 생성
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.relpath(file_path, folder_path)  # 폴더 구조 유지
-                    zip_file.write(file_path, arcname)
+        limited = rate_limited()
+        if limited:
+            return limited
 
-        zip_buffer.seek(0)  # 버퍼의 시작으로 이동
+        # 압축 파일 생성 (스냅샷별로 한 번만 만들고 동시 요청/짧은 시간 내 재요청은 결과 공유)
+        # 스냅샷 도입 전 폴더 구조는 경로가 바뀌지 않으므로 수정 시각을 key 에 포함
+        cache_key = ("folder-zip", folder_path, os.path.getmtime(folder_path))
+        zip_bytes = FOLDER_ZIP_CACHE.get_or_compute(cache_key, lambda: build_folder_zip(folder_path), SINGLE_FLIGHT)
 
         # 압축 파일을 클라이언트로 전송
         return send_file(
-            zip_buffer,
+            io.BytesIO(zip_bytes),
             mimetype="application/zip",
             as_attachment=True,
             download_name="korea_stocks_data_parts.zip",
@@ -99,8 +245,66 @@ def download_folder():
     except Exception as e:
         # 오류 발생 시 JSON 응답
         return jsonify({"success": False, "message": str(e)}), 500
+
+@app.route('/metrics/coalescing', methods=['GET'])
+def coalescing_metrics():
+    return jsonify({
+        "single_flight": {
+            "executions": SINGLE_FLIGHT.executions,
+            "coalesced": SINGLE_FLIGHT.coalesced,
+            "in_flight": SINGLE_FLIGHT.in_flight(),
+        },
+        "folder_zip_cache": {"hits": FOLDER_ZIP_CACHE.hits, "misses": FOLDER_ZIP_CACHE.misses},
+        "update_result_cache": {"hits": UPDATE_RESULT_CACHE.hits, "misses": UPDATE_RESULT_CACHE.misses},
+        "rate_limited": HEAVY_ROUTE_LIMITER.rejected,
+    })
+
+def parse_since(value, default):
+    """
+    since / Last-Event-ID 값을 버전 번호로 변환합니다.
+    숫자가 아니면 -1 을 반환하여 CHANGE_LOG.since 가 reset 을 알리도록 합니다.
+    """
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return -1
+
+@app.route('/signals/changes', methods=['GET'])
+def signal_changes():
+    # since 이후 버전에서 Action 이 바뀐 종목만 반환 (reset 이 true 면 전체 CSV 재다운로드 필요)
+    since = parse_since(request.args.get("since"), default=0)
+    return jsonify(CHANGE_LOG.since(since))
+
+@app.route('/signals/stream', methods=['GET'])
+def signal_stream():
+    """
+    Server-Sent Events: 재접속 시 Last-Event-ID 이후 변경분부터 전송합니다.
+    변경 로그는 프로세스 메모리에만 있으므로 여러 워커 프로세스로 실행하면
+    /update-stocks 를 처리한 프로세스에 연결된 클라이언트만 변경 이벤트를 받습니다.
+    """
+    # 알 수 없는 ID 는 reset 이벤트를 보내 전체 결과를 다시 받게 함
+    since = parse_since(request.headers.get("Last-Event-ID", request.args.get("since")), default=CHANGE_LOG.version)
+
+    def generate():
+        last = since
+        while True:
+            result = CHANGE_LOG.since(last)
+            if result["reset"]:
+                yield f"id: {result['version']}\nevent: reset\ndata: {{}}\n\n"
+            else:
+                for entry in result["entries"]:
+                    yield format_sse(entry)
+            last = result["version"]
+
+            if CHANGE_LOG.wait_for(last, timeout=SSE_KEEPALIVE_SECONDS) == last:
+                yield ": keepalive\n\n"
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
     
 if __name__ == "__main__":
     # 환경 변수 PORT가 있으면 사용하고, 없으면 5000번 포트를 사용
     port = int(os.environ.get("PORT", 5000))
-    app.run(host="0.0.0.0", port=port)
+    app.run(host="0.0.0.0", port=port, threaded=True)
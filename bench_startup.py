@@ -0,0 +1,74 @@
+"""
+Flask 앱의 콜드 스타트(import) 비용을 측정하는 벤치마크.
+`python -X importtime` 출력을 최상위 패키지 단위로 합산하여 보여줍니다.
+
+예시:
+    python bench_startup.py                # import app 만 측정 (다운로드 전용 인스턴스와 동일)
+    python bench_startup.py --pipeline     # /update-stocks 최초 호출 후 상태(파이프라인 로드 포함)
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_import(pipeline=False):
+    code = "import app"
+    if pipeline:
+        code += "; app.load_pipeline()"
+    code += "; import resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    wall_time = time.perf_counter() - started
+
+    if result.returncode != 0:
+        raise RuntimeError(f"import 실패:\n{result.stderr[-2000:]}")
+
+    peak_rss_kb = int(result.stdout.strip().splitlines()[-1])
+    return wall_time, peak_rss_kb, result.stderr
+
+
+def parse_importtime(stderr):
+    """
+    `import time: self [us] | cumulative | imported package` 형식의 줄을 읽어
+    최상위 패키지별 self 시간(us) 합계를 반환합니다.
+    """
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        package = name.strip().split(".")[0]
+        totals[package] += int(self_us)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flask 앱 import 시간 측정")
+    parser.add_argument("--pipeline", action="store_true", help="파이프라인 모듈 로드까지 포함")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [run_import(args.pipeline) for _ in range(args.repeat)]
+    wall_time, peak_rss_kb, stderr = min(runs, key=lambda r: r[0])
+    totals = parse_importtime(stderr)
+
+    print(f"{'pipeline' if args.pipeline else 'app'} import: 최소 {wall_time * 1000:.1f}ms "
+          f"({args.repeat}회 중), 최대 RSS {peak_rss_kb / 1024:.1f}MB, "
+          f"import 합계 {sum(totals.values()) / 1000:.1f}ms")
+    print(f"{'패키지':<24}{'self 합계(ms)':>14}")
+    for package, self_us in sorted(totals.items(), key=lambda x: x[1], reverse=True)[:args.top]:
+        print(f"{package:<24}{self_us / 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
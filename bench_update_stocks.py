@@ -0,0 +1,56 @@
+"""
+/update-stocks 파이프라인(다운로드 + 분석)을 재현 가능하게 측정하는 벤치마크.
+
+예시:
+    # 1) 네트워크가 있는 환경에서 픽스처 녹화
+    MARKET_DATA_MODE=record KRX_NOW=2026-10-16T16:00 python bench_update_stocks.py
+    # 2) 네트워크 없이 동일한 응답으로 재생
+    MARKET_DATA_MODE=replay KRX_NOW=2026-10-16T16:00 python bench_update_stocks.py --repeat 5
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+
+def run_once(stock_codes, work_dir):
+    from korea_stock_downloader import fetch_yahoo_finance_data
+    from stockAnalyzer import analyze_stocks_with_combined_logic
+
+    output_folder = os.path.join(work_dir, "korea_stocks_data_parts")
+    output_csv = os.path.join(work_dir, "korea_analysis_combined.csv")
+    os.makedirs(output_folder, exist_ok=True)
+
+    started = time.perf_counter()
+    summary = fetch_yahoo_finance_data(stock_codes, output_folder)
+    fetched = time.perf_counter()
+    analyze_stocks_with_combined_logic(output_folder, output_csv)
+    finished = time.perf_counter()
+
+    return fetched - started, finished - fetched, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="update-stocks 파이프라인 벤치마크")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not os.environ.get("KRX_NOW"):
+        print("경고: KRX_NOW 가 설정되지 않아 실행 시각에 따라 요청 구간(캐시 키)이 달라집니다.")
+
+    from stock_codes import stock_codes
+
+    for i in range(args.repeat):
+        work_dir = tempfile.mkdtemp(prefix="bench_update_stocks_")
+        try:
+            fetch_time, analyze_time, summary = run_once(stock_codes, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        print(f"[{i + 1}/{args.repeat}] 다운로드 {fetch_time:.3f}s, 분석 {analyze_time:.3f}s, "
+              f"갱신 {len(summary['updated'])}건, 데이터 없음 {len(summary['empty'])}건")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
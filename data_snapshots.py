@@ -0,0 +1,104 @@
+import os
+import shutil
+from datetime import datetime
+
+# 데이터 폴더 구조
+#   korea_stocks_data_parts/
+#       gen-20261019153500123456/   <- 갱신마다 새로 만드는 불변 스냅샷
+#       gen-20261020153500654321/
+#       current -> gen-20261020153500654321   <- 읽는 쪽이 사용하는 포인터 (심볼릭 링크)
+CURRENT_LINK = "current"
+GENERATION_PREFIX = "gen-"
+
+
+def current_generation(root):
+    """
+    읽기 작업이 사용할 현재 스냅샷 경로를 반환합니다.
+    반환된 실제 경로는 이후 포인터가 바뀌어도 그대로 유지되므로 읽는 도중 파일이 바뀌지 않습니다.
+    아직 스냅샷이 없는 기존 폴더 구조라면 root 를 그대로 반환합니다.
+    """
+    link = os.path.join(root, CURRENT_LINK)
+    if os.path.lexists(link):
+        return os.path.realpath(link)
+    return root
+
+
+def list_generations(root):
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if name.startswith(GENERATION_PREFIX) and os.path.isdir(os.path.join(root, name))
+    )
+
+
+def begin_generation(root):
+    """
+    새 스냅샷 디렉토리를 만들고 현재 스냅샷의 CSV 파일을 하드 링크(불가능하면 복사)로 채웁니다.
+    작성 중 남은 .tmp 등 다른 파일은 새 스냅샷으로 옮기지 않습니다.
+    새 스냅샷의 파일은 덮어쓰지 말고 임시 파일 작성 후 os.replace 로 교체해야
+    이전 스냅샷과 공유하는 파일이 변경되지 않습니다.
+    """
+    os.makedirs(root, exist_ok=True)
+    source = current_generation(root)
+
+    name = f"{GENERATION_PREFIX}{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+    generation = os.path.join(root, name)
+    os.makedirs(generation)
+
+    for file in os.listdir(source):
+        source_path = os.path.join(source, file)
+        if not file.endswith(".csv") or not os.path.isfile(source_path) or os.path.islink(source_path):
+            continue
+        target_path = os.path.join(generation, file)
+        try:
+            os.link(source_path, target_path)
+        except OSError:
+            shutil.copy2(source_path, target_path)
+
+    return generation
+
+
+def commit_generation(root, generation, keep=2):
+    """
+    current 포인터를 새 스냅샷으로 원자적으로 교체하고 오래된 스냅샷을 정리합니다.
+    """
+    link = os.path.join(root, CURRENT_LINK)
+    tmp_link = os.path.join(root, f".{CURRENT_LINK}-{os.getpid()}")
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.basename(generation), tmp_link)
+    os.replace(tmp_link, link)
+    print(f"데이터 스냅샷 교체 완료: {generation}")
+
+    gc_generations(root, keep)
+
+
+def discard_generation(generation):
+    """
+    변경 사항이 없거나 실패한 스냅샷을 삭제합니다 (current 는 그대로 유지).
+    """
+    shutil.rmtree(generation, ignore_errors=True)
+
+
+def gc_generations(root, keep=2):
+    """
+    current 를 포함해 최신 keep 개의 스냅샷만 남기고 삭제합니다.
+    이전 스냅샷을 읽는 중인 요청이 있을 수 있으므로 keep 은 2 이상을 권장합니다.
+    스냅샷 도입 전 root 에 직접 저장되어 있던 CSV 도 함께 정리합니다.
+    """
+    current = os.path.basename(current_generation(root))
+    generations = list_generations(root)
+    stale = [name for name in generations[:-keep] if name != current] if keep > 0 else []
+
+    for name in stale:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+        print(f"이전 스냅샷 삭제: {name}")
+
+    if os.path.lexists(os.path.join(root, CURRENT_LINK)):
+        for file in os.listdir(root):
+            path = os.path.join(root, file)
+            if file.endswith(".csv") and os.path.isfile(path) and not os.path.islink(path):
+                os.remove(path)
+
+    return stale
@@ -0,0 +1,243 @@
+"""
+분/시간 단위 봉 수집 및 분석.
+봉 데이터는 종목/간격/날짜별 파티션 파일로 저장하고 (전체 히스토리 재작성 없음),
+분석 시에는 최신 파티션부터 필요한 만큼만 읽어 일봉/시간봉으로 리샘플링한 뒤
+기존 analyze_stocks_with_combined_logic 을 그대로 실행합니다.
+
+예시:
+    python intraday_pipeline.py fetch --interval 60m
+    python intraday_pipeline.py analyze --interval 60m --rule 60min --output korea_analysis_hourly.csv
+"""
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+from collections import deque
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from krx_calendar import KST
+from market_data_cache import cached_download, FixtureMissingError
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INTRADAY_FOLDER = os.path.join(BASE_DIR, "korea_stocks_intraday")
+
+# Yahoo Finance 가 제공하는 간격별 최대 조회 기간(일, 경계 여유 1일)
+INTRADAY_LOOKBACK_DAYS = {
+    "1m": 29, "2m": 59, "5m": 59, "15m": 59, "30m": 59, "60m": 729, "90m": 59, "1h": 729,
+}
+
+# 요청 한 번에 조회할 수 있는 최대 기간(일). 1분봉은 요청당 7일 제한이 있어 나누어 요청
+INTRADAY_MAX_SPAN_DAYS = {"1m": 6}
+
+# 리샘플링 시 컬럼별 집계 방식
+OHLCV_AGGREGATION = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+TIMEZONE = "Asia/Seoul"
+INTRADAY_CACHE_TTL_SECONDS = 300
+
+
+def _plain_code(code):
+    return code.replace(".KS", "").replace(".KQ", "")
+
+
+def partition_folder(root, code, interval):
+    return os.path.join(root, _plain_code(code), interval)
+
+
+def list_partitions(root, code, interval):
+    """
+    날짜순으로 정렬된 파티션 파일 경로 목록 (파일 하나 = 하루치 봉)
+    """
+    folder = partition_folder(root, code, interval)
+    if not os.path.isdir(folder):
+        return []
+    return [os.path.join(folder, f) for f in sorted(os.listdir(folder)) if f.endswith(".csv")]
+
+
+def read_partition(path):
+    bars = pd.read_csv(path, parse_dates=["Datetime"])
+    return bars.set_index("Datetime")
+
+
+def write_partition(path, bars):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    bars.to_csv(tmp_path, index_label="Datetime", encoding="utf-8-sig")
+    os.replace(tmp_path, path)
+
+
+def request_spans(start, end, interval):
+    """
+    [start, end) 날짜 구간을 간격별 요청당 최대 기간 이하의 구간들로 나눕니다.
+    """
+    span = timedelta(days=INTRADAY_MAX_SPAN_DAYS.get(interval, INTRADAY_LOOKBACK_DAYS[interval] + 1))
+    spans = []
+    while start < end:
+        spans.append((start, min(start + span, end)))
+        start += span
+    return spans
+
+
+def download_bars(code, start, end, interval):
+    """
+    요청당 최대 기간을 넘지 않도록 나누어 받은 봉을 하나로 합칩니다.
+    """
+    chunks = []
+    for chunk_start, chunk_end in request_spans(start, end, interval):
+        # 장중 데이터는 계속 바뀌므로 캐시 유효 시간을 짧게 사용
+        bars = cached_download(code, start=chunk_start.strftime("%Y-%m-%d"), end=chunk_end.strftime("%Y-%m-%d"),
+                               interval=interval, ttl=INTRADAY_CACHE_TTL_SECONDS)
+        if not bars.empty:
+            chunks.append(bars)
+    if not chunks:
+        return pd.DataFrame()
+    bars = pd.concat(chunks)
+    return bars[~bars.index.duplicated(keep="last")]
+
+
+def fetch_intraday_bars(stock_codes, root=INTRADAY_FOLDER, interval="60m", now=None):
+    """
+    종목별 분/시간봉을 내려받아 날짜별 파티션으로 저장합니다.
+    마지막 파티션의 날짜부터 다시 받아 장중에 저장된 미완성 파티션을 채웁니다.
+    조회 구간은 한국 시간(KST) 날짜 기준으로 계산합니다.
+    Returns:
+        dict: {"updated": [...], "empty": [...], "failed": [...]}
+    """
+    if interval not in INTRADAY_LOOKBACK_DAYS:
+        raise ValueError(f"지원하지 않는 간격: {interval} (허용: {', '.join(INTRADAY_LOOKBACK_DAYS)})")
+
+    now = now or datetime.now(KST)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=KST)
+    today = now.astimezone(KST).date()
+    earliest = today - timedelta(days=INTRADAY_LOOKBACK_DAYS[interval])
+    end = today + timedelta(days=1)
+
+    summary = {"updated": [], "empty": [], "failed": []}
+
+    for code, name in stock_codes.items():
+        try:
+            partitions = list_partitions(root, code, interval)
+            if partitions:
+                last_day = datetime.strptime(os.path.basename(partitions[-1])[:10], "%Y-%m-%d").date()
+                start = max(last_day, earliest)
+            else:
+                start = earliest
+
+            new_bars = download_bars(code, start, end, interval)
+            if new_bars.empty:
+                print(f"데이터가 비어 있음: {name} ({code}) {interval}")
+                summary["empty"].append(code)
+                continue
+
+            new_bars.columns = new_bars.columns.get_level_values(0)
+            new_bars = new_bars[list(OHLCV_AGGREGATION)]
+            if new_bars.index.tz is not None:
+                new_bars.index = new_bars.index.tz_convert(TIMEZONE).tz_localize(None)
+            new_bars.index.name = "Datetime"
+
+            # 날짜별 파티션에 병합 저장 (해당 날짜 파일만 다시 씀)
+            folder = partition_folder(root, code, interval)
+            for day, day_bars in new_bars.groupby(new_bars.index.date):
+                path = os.path.join(folder, f"{day.strftime('%Y-%m-%d')}.csv")
+                if os.path.exists(path):
+                    day_bars = pd.concat([read_partition(path), day_bars])
+                    day_bars = day_bars[~day_bars.index.duplicated(keep="last")].sort_index()
+                write_partition(path, day_bars)
+
+            print(f"{name} ({code}) {interval} 봉 저장 완료: {len(new_bars)}개")
+            summary["updated"].append(code)
+
+        except FixtureMissingError:
+            raise
+        except Exception as e:
+            print(f"에러 발생: {name} ({code}): {e}")
+            summary["failed"].append(code)
+
+    return summary
+
+
+def stream_resample(partition_paths, rule):
+    """
+    파티션 파일을 하나씩 읽어 rule 간격으로 리샘플링한 결과를 순서대로 yield 합니다.
+    파티션이 하루 단위이므로 하루 이하의 rule 은 파티션 경계에서 봉이 나뉘지 않습니다.
+    """
+    if pd.Timedelta(rule) > pd.Timedelta("1D"):
+        raise ValueError(f"하루보다 긴 리샘플링 간격은 지원하지 않습니다: {rule}")
+
+    for path in partition_paths:
+        bars = read_partition(path)
+        resampled = bars.resample(rule).agg(OHLCV_AGGREGATION).dropna(subset=["Close"])
+        if not resampled.empty:
+            yield resampled
+
+
+def load_resampled_history(root, code, name, interval="60m", rule="1D", max_bars=500):
+    """
+    최신 파티션부터 거꾸로 읽어 최근 max_bars 개의 리샘플링 봉만 메모리에 유지합니다.
+    반환 형식은 일봉 CSV 와 같아 stockAnalyzer 가 그대로 사용할 수 있습니다.
+    """
+    chunks = deque()
+    total = 0
+    for chunk in stream_resample(reversed(list_partitions(root, code, interval)), rule):
+        chunks.appendleft(chunk)
+        total += len(chunk)
+        if total >= max_bars:
+            break
+
+    if not chunks:
+        return pd.DataFrame()
+
+    history = pd.concat(chunks).tail(max_bars).reset_index()
+    history = history.rename(columns={"Datetime": "Date"})
+    history["StockName"] = name
+    history["StockCode"] = _plain_code(code)
+    history["Adj Close"] = history["Close"]
+    return history[["Date", "StockName", "StockCode", "Open", "High", "Low", "Close", "Volume", "Adj Close"]]
+
+
+def analyze_intraday(stock_codes, output_path, root=INTRADAY_FOLDER, interval="60m", rule="1D", max_bars=500):
+    """
+    분/시간봉을 rule 간격으로 리샘플링하여 분석합니다.
+    종목별로 최근 max_bars 개만 임시 폴더에 저장하므로 분석 메모리는 히스토리 길이와 무관합니다.
+    """
+    from stockAnalyzer import analyze_stocks_with_combined_logic
+
+    work_dir = tempfile.mkdtemp(prefix="intraday_")
+    try:
+        for code, name in stock_codes.items():
+            history = load_resampled_history(root, code, name, interval, rule, max_bars)
+            if history.empty:
+                print(f"리샘플링할 데이터 없음: {name} ({code})")
+                continue
+            history.to_csv(os.path.join(work_dir, f"{name}_{_plain_code(code)}.csv"), index=False, encoding="utf-8-sig")
+
+        return analyze_stocks_with_combined_logic(work_dir, output_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    from stock_codes import load_stock_codes
+
+    parser = argparse.ArgumentParser(description="분/시간봉 수집 및 분석")
+    parser.add_argument("command", choices=["fetch", "analyze"])
+    parser.add_argument("--interval", default="60m")
+    parser.add_argument("--rule", default="1D", help="분석에 사용할 리샘플링 간격 (예: 1D, 60min)")
+    parser.add_argument("--max-bars", type=int, default=500)
+    parser.add_argument("--root", default=INTRADAY_FOLDER)
+    parser.add_argument("--output", default="korea_analysis_intraday.csv")
+    args = parser.parse_args()
+
+    stock_codes = load_stock_codes()
+    if args.command == "fetch":
+        fetch_intraday_bars(stock_codes, args.root, args.interval)
+    else:
+        analyze_intraday(stock_codes, args.output, args.root, args.interval, args.rule, args.max_bars)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
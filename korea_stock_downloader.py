@@ -1,20 +1,31 @@
-import yfinance as yf
 import pandas as pd
 import os
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
+from krx_calendar import load_holidays, last_closed_session, missing_session_range
+from market_data_cache import cached_download, FixtureMissingError
+from data_snapshots import begin_generation, commit_generation, discard_generation
 
 # 데이터를 가져오는 함수
-def fetch_yahoo_finance_data(stock_codes, output_folder):
-    # 오늘 날짜 및 내일 날짜 설정
+def fetch_yahoo_finance_data(stock_codes, output_folder, now=None):
+    """
+    KRX 거래일 기준으로 종목별 빠진 세션만 내려받아 기존 CSV에 병합합니다.
+    Returns:
+        dict: {"updated": [...], "up_to_date": [...], "empty": [...], "failed": [...]}
+              형태의 종목 코드 목록 (updated 가 비어 있으면 변경 없음)
+    """
+    # 오늘 날짜 및 휴장일 설정
     today = datetime.now().strftime("%Y-%m-%d")
-    tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    holidays = load_holidays()
+
+    summary = {"updated": [], "up_to_date": [], "empty": [], "failed": []}
 
     for code, name in stock_codes.items():
         try:
             # 기존 파일 확인
             existing_files = [
                 f for f in os.listdir(output_folder)
-                if f.startswith(f"{name}_{code.replace('.KS', '').replace('.KQ', '')}")
+                if f.startswith(f"{name}_{code.replace('.KS', '').replace('.KQ', '')}") and f.endswith(".csv")
             ]
 
             # 기존 파일에서 최신 날짜 추출
@@ -22,18 +33,28 @@ def fetch_yahoo_finance_data(stock_codes, output_folder):
             existing_data = pd.DataFrame()
             if existing_files:
                 latest_file = max(existing_files, key=lambda x: x.split("_")[-1].replace(".csv", ""))
-                latest_date = latest_file.split("_")[-1].replace(".csv", "")
                 existing_data = pd.read_csv(os.path.join(output_folder, latest_file), parse_dates=["Date"])
+                # 파일명은 저장한 날짜이므로 실제 마지막 거래일은 데이터에서 확인
+                if not existing_data.empty:
+                    latest_date = existing_data["Date"].max()
+
+            # 새로 마감된 세션이 없으면 다운로드/파일 재작성 생략
+            session_range = missing_session_range(latest_date, now, holidays)
+            if session_range is None:
+                summary["up_to_date"].append(code)
+                continue
 
             # 데이터 가져올 시작 날짜 설정
-            start_date = (datetime.strptime(latest_date, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d") if latest_date else "2020-01-01"
+            start_date, end_date = session_range
+            start_date = start_date or "2020-01-01"
 
-            # Yahoo Finance에서 데이터 가져오기
-            new_data = yf.download(code, start=start_date, end=tomorrow)
+            # Yahoo Finance에서 데이터 가져오기 (캐시/record/replay 지원)
+            new_data = cached_download(code, start=start_date, end=end_date)
 
             if new_data.empty:
                 print(f"데이터가 비어 있음: {name} ({code})")
-                break
+                summary["empty"].append(code)
+                continue
 
             # 데이터 정리
             new_data.columns = new_data.columns.get_level_values(0)
@@ -67,15 +88,62 @@ def fetch_yahoo_finance_data(stock_codes, output_folder):
             # 새로운 파일 이름에 오늘 날짜 포함
             new_file_name = os.path.join(output_folder, f"{name}_{code.replace('.KS', '').replace('.KQ', '')}_{today}.csv")
 
-            # 병합된 데이터 저장
-            combined_data.to_csv(new_file_name, index=False, encoding="utf-8-sig")
+            # 병합된 데이터 저장 (임시 파일 작성 후 교체: 이전 스냅샷과 공유하는 하드 링크 파일을 덮어쓰지 않음)
+            tmp_file_name = f"{new_file_name}.tmp"
+            combined_data.to_csv(tmp_file_name, index=False, encoding="utf-8-sig")
+            os.replace(tmp_file_name, new_file_name)
             print(f"{name} ({code}) 데이터 저장 완료: {new_file_name}")
 
-            # 기존 파일 삭제
+            # 기존 파일 삭제 (같은 날 다시 저장한 경우 방금 쓴 파일은 유지)
             for old_file in existing_files:
+                if old_file == os.path.basename(new_file_name):
+                    continue
                 old_file_path = os.path.join(output_folder, old_file)
                 os.remove(old_file_path)
                 print(f"기존 파일 삭제 완료: {old_file_path}")
 
+            summary["updated"].append(code)
+
+        except FixtureMissingError:
+            # 재생 모드에서 픽스처가 빠지면 결과가 녹화 시점과 달라지므로 전체 실행을 중단
+            raise
         except Exception as e:
             print(f"에러 발생: {name} ({code}): {e}")
+            summary["failed"].append(code)
+
+    if summary["empty"]:
+        print(f"데이터가 없는 종목: {', '.join(summary['empty'])}")
+
+    return summary
+
+
+def schedule_refreshes(stock_codes, output_folder, on_update=None, poll_interval=600):
+    """
+    새 거래일 세션이 마감될 때마다 데이터를 갱신하는 간단한 스케줄러.
+    마지막으로 처리한 세션과 같으면 아무 작업도 하지 않고 대기합니다.
+    output_folder 는 스냅샷 루트로, 새 스냅샷에 내려받은 뒤 갱신된 종목이 있을 때만 current 를 교체합니다.
+    Args:
+        on_update (callable): 새 데이터가 저장된 경우 summary 를 인자로 호출 (예: 분석 실행)
+        poll_interval (int): 세션 마감 여부를 확인하는 간격(초)
+    """
+    last_refreshed = None
+    while True:
+        session = last_closed_session()
+        if session != last_refreshed:
+            generation = begin_generation(output_folder)
+            try:
+                summary = fetch_yahoo_finance_data(stock_codes, generation)
+            except Exception:
+                discard_generation(generation)
+                raise
+
+            if summary["updated"]:
+                commit_generation(output_folder, generation)
+                if on_update is not None:
+                    on_update(summary)
+            else:
+                discard_generation(generation)
+            # 실패했거나 데이터가 아직 없는 종목(제공처 반영 지연)이 있으면 다음 주기에 다시 시도
+            if not summary["failed"] and not summary["empty"]:
+                last_refreshed = session
+        time.sleep(poll_interval)
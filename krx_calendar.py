@@ -0,0 +1,139 @@
+import os
+from datetime import datetime, date, time, timedelta, timezone
+
+# 한국 표준시 (KST, UTC+9)
+KST = timezone(timedelta(hours=9))
+
+# 정규장 마감 시각 (15:30)
+MARKET_CLOSE = time(15, 30)
+
+# Yahoo Finance 의 KRX 일봉은 마감 직후 늦게/부분적으로 반영되므로
+# 마감 후 이 시각(16:00)부터 당일 세션이 종료된 것으로 간주 (이전에 받으면 미완성 봉이 저장되고 다시 요청되지 않음)
+SESSION_SETTLED = time(16, 0)
+
+# KRX 휴장일 목록 (주말 제외)
+KRX_HOLIDAYS = {
+    # 2024
+    "2024-01-01", "2024-02-09", "2024-02-12", "2024-03-01", "2024-04-10",
+    "2024-05-01", "2024-05-06", "2024-05-15", "2024-06-06", "2024-08-15",
+    "2024-09-16", "2024-09-17", "2024-09-18", "2024-10-01", "2024-10-03",
+    "2024-10-09", "2024-12-25", "2024-12-31",
+    # 2025
+    "2025-01-01", "2025-01-27", "2025-01-28", "2025-01-29", "2025-01-30",
+    "2025-03-03", "2025-05-01", "2025-05-05", "2025-05-06", "2025-06-03",
+    "2025-06-06", "2025-08-15", "2025-10-03", "2025-10-06", "2025-10-07",
+    "2025-10-08", "2025-10-09", "2025-12-25", "2025-12-31",
+    # 2026
+    "2026-01-01", "2026-02-16", "2026-02-17", "2026-02-18", "2026-03-02",
+    "2026-05-01", "2026-05-05", "2026-05-25", "2026-06-03", "2026-08-17",
+    "2026-09-24", "2026-09-25", "2026-10-05", "2026-10-09", "2026-12-25",
+    "2026-12-31",
+    # 2027
+    "2027-01-01", "2027-02-08", "2027-02-09", "2027-03-01", "2027-05-05",
+    "2027-05-13", "2027-08-16", "2027-09-14", "2027-09-15", "2027-09-16",
+    "2027-10-04", "2027-10-11", "2027-12-27", "2027-12-31",
+}
+
+# 기본 목록이 포함하는 마지막 연도 (이후 연도는 KRX_HOLIDAYS_FILE 로 보충해야 함)
+KRX_HOLIDAYS_LAST_YEAR = max(int(d[:4]) for d in KRX_HOLIDAYS)
+_warned_years = set()
+
+
+def load_holidays(holiday_file=None):
+    """
+    기본 휴장일 목록에 추가 휴장일 파일(한 줄에 YYYY-MM-DD 하나)을 합쳐 반환합니다.
+    파일 경로를 주지 않으면 환경변수 KRX_HOLIDAYS_FILE 을 사용합니다.
+    """
+    holidays = {datetime.strptime(d, "%Y-%m-%d").date() for d in KRX_HOLIDAYS}
+
+    holiday_file = holiday_file or os.environ.get("KRX_HOLIDAYS_FILE")
+    if holiday_file and os.path.exists(holiday_file):
+        with open(holiday_file, encoding="utf-8") as f:
+            for line in f:
+                line = line.split("#")[0].strip()
+                if line:
+                    holidays.add(datetime.strptime(line, "%Y-%m-%d").date())
+
+    return holidays
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if hasattr(value, "date"):  # pandas Timestamp
+        return value.date()
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def is_trading_day(day, holidays=None):
+    day = _to_date(day)
+    holidays = load_holidays() if holidays is None else holidays
+    return day.weekday() < 5 and day not in holidays
+
+
+def last_closed_session(now=None, holidays=None):
+    """
+    현재 시각 기준으로 가장 최근에 마감된 거래일을 반환합니다.
+    데이터 반영 지연을 고려해 16:00 KST (SESSION_SETTLED) 전이라면 당일은 아직 종료되지 않은 세션으로 봅니다.
+    """
+    holidays = load_holidays() if holidays is None else holidays
+    # 재현 가능한 실행(replay 벤치마크 등)을 위해 KRX_NOW 로 기준 시각 고정 가능
+    if now is None and os.environ.get("KRX_NOW"):
+        now = datetime.fromisoformat(os.environ["KRX_NOW"])
+    now = now or datetime.now(KST)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=KST)
+    now = now.astimezone(KST)
+
+    day = now.date()
+    if now.time() < SESSION_SETTLED:
+        day -= timedelta(days=1)
+
+    if day.year > KRX_HOLIDAYS_LAST_YEAR and not os.environ.get("KRX_HOLIDAYS_FILE") \
+            and day.year not in _warned_years:
+        _warned_years.add(day.year)
+        print(f"경고: 기본 휴장일 목록은 {KRX_HOLIDAYS_LAST_YEAR}년까지입니다. "
+              f"{day.year}년 휴장일은 KRX_HOLIDAYS_FILE 로 지정하세요 (공휴일이 거래일로 처리됨).")
+
+    while not is_trading_day(day, holidays):
+        day -= timedelta(days=1)
+    return day
+
+
+def trading_days_between(start, end, holidays=None):
+    """
+    start 초과 end 이하 구간의 거래일 목록 (start 이후 새로 마감된 세션들)
+    """
+    holidays = load_holidays() if holidays is None else holidays
+    start, end = _to_date(start), _to_date(end)
+
+    days = []
+    day = start + timedelta(days=1)
+    while day <= end:
+        if is_trading_day(day, holidays):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+def missing_session_range(latest_date, now=None, holidays=None):
+    """
+    기존 데이터의 마지막 날짜 이후 빠진 세션 구간을 (start, end) 문자열로 반환합니다.
+    end 는 yfinance 규칙에 맞춰 마지막 세션 다음 날(미포함)입니다.
+    새로 마감된 세션이 없다면 None 을 반환합니다.
+    """
+    holidays = load_holidays() if holidays is None else holidays
+    last_session = last_closed_session(now, holidays)
+
+    if latest_date is None:
+        start = None
+    else:
+        missing = trading_days_between(latest_date, last_session, holidays)
+        if not missing:
+            return None
+        start = missing[0].strftime("%Y-%m-%d")
+
+    end = (last_session + timedelta(days=1)).strftime("%Y-%m-%d")
+    return start, end
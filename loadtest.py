@@ -0,0 +1,304 @@
+"""
+합성 데이터로 로컬 앱 인스턴스를 띄워 엔드포인트별 부하 테스트를 실행합니다.
+동시 클라이언트 수를 단계적으로 늘리며 p50/p95/p99 지연 시간, 처리량, 서버 RSS 를 측정하고
+저장된 기준값(loadtest_thresholds.json)보다 나빠지면 종료 코드 1 로 실패합니다.
+
+예시:
+    python loadtest.py --update-thresholds     # 현재 결과로 기준값 저장 (여유 20%)
+    python loadtest.py                         # 기준값과 비교 (기준값 파일이 없으면 실패)
+    python loadtest.py --clients 1 8 32 --duration 5 --tickers 200
+"""
+import os
+import io
+import sys
+import csv
+import gzip
+import json
+import hashlib
+import time
+import random
+import shutil
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import urllib.request
+from datetime import date, datetime, timezone, timedelta
+
+from result_artifacts import ARTIFACT_NAME, FORMATS, ENCODING_SUFFIX, LATEST_MANIFEST, source_signature
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+THRESHOLDS_FILE = os.path.join(BASE_DIR, "loadtest_thresholds.json")
+
+DEFAULT_ENDPOINTS = ["/download/korea-analysis-combined", "/download/folder"]
+
+# 기준값 갱신 시 현재 결과에 더하는 여유
+THRESHOLD_MARGIN = 1.2
+
+
+def generate_synthetic_data(work_dir, tickers=64, days=1200, seed=42):
+    """
+    app 이 읽는 폴더 구조(korea_stocks_data_parts/, korea_analysis_combined.csv,
+    korea_analysis_artifacts/)로 합성 데이터를 만듭니다.
+    """
+    rng = random.Random(seed)
+    folder = os.path.join(work_dir, "korea_stocks_data_parts")
+    os.makedirs(folder, exist_ok=True)
+
+    start = date(2020, 1, 1)
+    dates = [start + timedelta(days=i) for i in range(days * 7 // 5 + 7) if (start + timedelta(days=i)).weekday() < 5][:days]
+
+    rows = []
+    for t in range(tickers):
+        code = f"{900000 + t:06d}"
+        name = f"합성종목{t}"
+        price = rng.uniform(5000, 200000)
+        with open(os.path.join(folder, f"{name}_{code}_{dates[-1]}.csv"), "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Date", "StockName", "StockCode", "Open", "High", "Low", "Close", "Volume", "Adj Close"])
+            for day in dates:
+                open_price = price
+                price = max(100.0, price * (1 + rng.gauss(0, 0.02)))
+                high, low = max(open_price, price) * 1.01, min(open_price, price) * 0.99
+                writer.writerow([day, name, code, f"{open_price:.2f}", f"{high:.2f}", f"{low:.2f}",
+                                 f"{price:.2f}", rng.randint(10_000, 5_000_000), f"{price:.2f}"])
+        rows.append({"id": "", "stockname": name, "stockcode": code, "CurrentPrice": f"{price:.2f}",
+                     "Action": rng.choice(["관망(추가 신호 대기)", "매수 고려(이동평균선 상승 일치)", "매도 고려(과매수 상태)"])})
+
+    with open(os.path.join(work_dir, "korea_analysis_combined.csv"), "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    write_synthetic_artifacts(work_dir, rows)
+
+
+def write_synthetic_artifacts(work_dir, rows):
+    """
+    아티팩트 다운로드 경로를 측정할 수 있도록 CSV/JSON 과 gzip 압축본, latest.json 을 만듭니다.
+    (pyarrow/brotli 없이 표준 라이브러리만 사용하므로 Arrow 형식과 br 인코딩은 생략)
+    """
+    csv_buffer = io.StringIO()
+    writer = csv.DictWriter(csv_buffer, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    rendered = {
+        "csv": csv_buffer.getvalue().encode("utf-8-sig"),
+        "json": json.dumps(rows, ensure_ascii=False).encode("utf-8"),
+    }
+
+    artifact_root = os.path.join(work_dir, "korea_analysis_artifacts")
+    version = "v00000000000000000000"
+    version_dir = os.path.join(artifact_root, version)
+    os.makedirs(version_dir, exist_ok=True)
+
+    manifest = {"version": version, "created_at": datetime.now(timezone.utc).isoformat(),
+                "rows": len(rows), "source": source_signature(os.path.join(work_dir, "korea_analysis_combined.csv")),
+                "formats": {}}
+    for fmt, raw in rendered.items():
+        variants = {}
+        for encoding, data in (("gzip", gzip.compress(raw, compresslevel=9, mtime=0)), ("identity", raw)):
+            file_name = f"{ARTIFACT_NAME}.{FORMATS[fmt]['extension']}{ENCODING_SUFFIX[encoding]}"
+            with open(os.path.join(version_dir, file_name), "wb") as f:
+                f.write(data)
+            variants[encoding] = {"file": file_name, "size": len(data), "etag": hashlib.sha256(data).hexdigest()[:32]}
+        manifest["formats"][fmt] = {"mimetype": FORMATS[fmt]["mimetype"], "variants": variants}
+
+    for path in (os.path.join(version_dir, "manifest.json"), os.path.join(artifact_root, LATEST_MANIFEST)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(work_dir):
+    """
+    작업 디렉토리의 합성 데이터를 제공하는 다운로드 전용(READ_ONLY) 앱을 실행합니다.
+    """
+    port = _free_port()
+    # 부하 테스트 클라이언트는 모두 같은 주소이므로 클라이언트별 요청 제한은 끔
+    env = dict(os.environ, PORT=str(port), READ_ONLY="1", HEAVY_ROUTE_RATE_PER_MINUTE="0", STOCK_DATA_DIR=work_dir)
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, "app.py")],
+        cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("앱 실행 실패")
+        try:
+            urllib.request.urlopen(base_url + "/", timeout=1).read()
+            return process, base_url
+        except OSError:
+            time.sleep(0.2)
+
+    process.kill()
+    raise RuntimeError("앱이 30초 안에 응답하지 않습니다.")
+
+
+def read_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_level(url, clients, duration, server_pid):
+    """
+    clients 개의 스레드가 duration 초 동안 url 을 반복 요청합니다.
+    """
+    latencies = []
+    errors = [0]
+    max_rss = [read_rss_mb(server_pid)]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=60) as response:
+                    response.read()
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+            except OSError:
+                with lock:
+                    errors[0] += 1
+
+    def sample_rss():
+        while time.perf_counter() < stop_at:
+            max_rss[0] = max(max_rss[0], read_rss_mb(server_pid))
+            time.sleep(0.1)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)] + [threading.Thread(target=sample_rss)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_rss_mb": max_rss[0],
+    }
+
+
+def check_thresholds(results, thresholds):
+    """
+    기준값을 기록한 동시 접속 수(clients)와 같은 단계의 결과를 기준값과 비교하여 위반 목록을 반환합니다.
+    해당 단계를 실행하지 않았으면 위반으로 봅니다 (더 낮은 부하로 통과하지 않도록).
+    """
+    failures = []
+    for endpoint, levels in results.items():
+        limit = thresholds.get(endpoint)
+        if not limit:
+            continue
+        worst = next((level for level in levels if level["clients"] == limit["clients"]), None)
+        if worst is None:
+            failures.append(f"{endpoint}: 기준 단계 clients={limit['clients']} 가 실행되지 않았습니다 "
+                            f"(실행: {', '.join(str(level['clients']) for level in levels)})")
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms", "max_rss_mb"):
+            if key in limit and worst[key] > limit[key]:
+                failures.append(f"{endpoint} {key}: {worst[key]:.1f} > {limit[key]:.1f}")
+        if "min_rps" in limit and worst["rps"] < limit["min_rps"]:
+            failures.append(f"{endpoint} rps: {worst['rps']:.1f} < {limit['min_rps']:.1f}")
+        if worst["errors"] > limit.get("max_errors", 0):
+            failures.append(f"{endpoint} errors: {worst['errors']} > {limit.get('max_errors', 0)}")
+    return failures
+
+
+def build_thresholds(results):
+    thresholds = {}
+    for endpoint, levels in results.items():
+        worst = levels[-1]
+        thresholds[endpoint] = {
+            "clients": worst["clients"],
+            "p50_ms": round(worst["p50_ms"] * THRESHOLD_MARGIN, 1),
+            "p95_ms": round(worst["p95_ms"] * THRESHOLD_MARGIN, 1),
+            "p99_ms": round(worst["p99_ms"] * THRESHOLD_MARGIN, 1),
+            "max_rss_mb": round(worst["max_rss_mb"] * THRESHOLD_MARGIN, 1),
+            "min_rps": round(worst["rps"] / THRESHOLD_MARGIN, 1),
+            "max_errors": 0,
+        }
+    return thresholds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flask 엔드포인트 부하 테스트")
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS)
+    parser.add_argument("--clients", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=5.0, help="단계별 측정 시간(초)")
+    parser.add_argument("--tickers", type=int, default=64)
+    parser.add_argument("--days", type=int, default=1200)
+    parser.add_argument("--thresholds", default=THRESHOLDS_FILE)
+    parser.add_argument("--update-thresholds", action="store_true")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="loadtest_")
+    process = None
+    try:
+        generate_synthetic_data(work_dir, args.tickers, args.days)
+        process, base_url = start_server(work_dir)
+
+        results = {}
+        for endpoint in args.endpoints:
+            results[endpoint] = []
+            for clients in sorted(args.clients):
+                level = run_level(base_url + endpoint, clients, args.duration, process.pid)
+                results[endpoint].append(level)
+                print(f"{endpoint:<36} clients={clients:<3} req={level['requests']:<6} err={level['errors']:<3} "
+                      f"rps={level['rps']:8.1f} p50={level['p50_ms']:8.1f}ms p95={level['p95_ms']:8.1f}ms "
+                      f"p99={level['p99_ms']:8.1f}ms rss={level['max_rss_mb']:7.1f}MB")
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.update_thresholds:
+        with open(args.thresholds, "w", encoding="utf-8") as f:
+            json.dump(build_thresholds(results), f, indent=2, ensure_ascii=False)
+        print(f"기준값 저장 완료: {args.thresholds}")
+        return 0
+
+    if not os.path.exists(args.thresholds):
+        print(f"기준값 파일 없음: {args.thresholds} (--update-thresholds 로 생성)")
+        return 1
+
+    with open(args.thresholds, encoding="utf-8") as f:
+        failures = check_thresholds(results, json.load(f))
+    for failure in failures:
+        print(f"기준 초과: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
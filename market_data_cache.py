@@ -0,0 +1,130 @@
+import os
+import time
+import hashlib
+import pandas as pd
+
+# 캐시/픽스처 기본 경로 및 설정 (환경변수로 변경 가능)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.environ.get("MARKET_DATA_CACHE_DIR", os.path.join(BASE_DIR, ".market_data_cache"))
+FIXTURE_DIR = os.environ.get("MARKET_DATA_FIXTURE_DIR", os.path.join(BASE_DIR, "market_data_fixtures"))
+CACHE_TTL_SECONDS = int(os.environ.get("MARKET_DATA_CACHE_TTL", 6 * 60 * 60))
+CACHE_MAX_BYTES = int(os.environ.get("MARKET_DATA_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# live: 캐시 사용 후 미스 시 다운로드
+# record: 캐시 사용 + 응답(캐시 적중 포함)을 픽스처로 저장
+# replay: 픽스처만 사용 (네트워크 접근 없음, 픽스처가 없으면 실패)
+# off: 캐시 없이 항상 다운로드
+MODES = ("live", "record", "replay", "off")
+
+
+class FixtureMissingError(FileNotFoundError):
+    """
+    replay 모드에서 요청에 해당하는 픽스처가 없을 때 발생 (빈 데이터로 조용히 넘어가지 않도록)
+    """
+
+
+def get_mode():
+    mode = os.environ.get("MARKET_DATA_MODE", "live").lower()
+    if mode not in MODES:
+        raise ValueError(f"지원하지 않는 MARKET_DATA_MODE: {mode} (허용: {', '.join(MODES)})")
+    return mode
+
+
+def cache_key(code, start, end, interval="1d"):
+    raw = f"{code}|{start}|{end}|{interval}"
+    digest = hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+    safe_code = code.replace("/", "_")
+    return f"{safe_code}_{interval}_{digest}.pkl"
+
+
+def _read_entry(path, ttl=None):
+    if not os.path.exists(path):
+        return None
+    if ttl is not None and time.time() - os.path.getmtime(path) > ttl:
+        return None
+    try:
+        data = pd.read_pickle(path)
+    except Exception as e:
+        print(f"캐시 읽기 실패, 무시합니다: {path}: {e}")
+        return None
+    # LRU 제거를 위해 접근 시각 갱신 (mtime 은 TTL 판단에 사용하므로 유지)
+    os.utime(path, (time.time(), os.path.getmtime(path)))
+    return data
+
+
+def _write_entry(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    data.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def evict_cache(cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL_SECONDS):
+    """
+    TTL 이 지난 항목을 삭제하고, 전체 크기가 max_bytes 를 넘으면
+    가장 오래 사용되지 않은 항목부터 삭제합니다.
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    now = time.time()
+    entries = []
+    removed = 0
+    for file in os.listdir(cache_dir):
+        if not file.endswith(".pkl"):
+            continue
+        path = os.path.join(cache_dir, file)
+        stat = os.stat(path)
+        if ttl is not None and now - stat.st_mtime > ttl:
+            os.remove(path)
+            removed += 1
+        else:
+            entries.append((stat.st_atime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+        removed += 1
+
+    return removed
+
+
+def cached_download(code, start=None, end=None, interval="1d", mode=None,
+                    cache_dir=None, fixture_dir=None, ttl=None):
+    """
+    yf.download 를 (code, start, end, interval) 키로 캐시하여 호출합니다.
+    replay 모드에서는 저장된 픽스처만 사용하며, 없으면 FixtureMissingError 를 발생시킵니다.
+    record 모드에서는 캐시 적중 응답도 픽스처로 저장합니다.
+    """
+    mode = mode or get_mode()
+    cache_dir = cache_dir or CACHE_DIR
+    fixture_dir = fixture_dir or FIXTURE_DIR
+    ttl = CACHE_TTL_SECONDS if ttl is None else ttl
+    key = cache_key(code, start, end, interval)
+
+    if mode == "replay":
+        data = _read_entry(os.path.join(fixture_dir, key))
+        if data is None:
+            raise FixtureMissingError(f"픽스처 없음 (replay): {code} {start}~{end} {interval} -> {key}")
+        return data
+
+    if mode != "off":
+        data = _read_entry(os.path.join(cache_dir, key), ttl)
+        if data is not None:
+            if mode == "record":
+                _write_entry(os.path.join(fixture_dir, key), data)
+            return data
+
+    import yfinance as yf
+    data = yf.download(code, start=start, end=end, interval=interval)
+
+    if mode != "off" and not data.empty:
+        _write_entry(os.path.join(cache_dir, key), data)
+        evict_cache(cache_dir, CACHE_MAX_BYTES, ttl)
+    if mode == "record":
+        _write_entry(os.path.join(fixture_dir, key), data)
+
+    return data
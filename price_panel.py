@@ -0,0 +1,266 @@
+import os
+import sys
+import time
+import pickle
+import resource
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from stockAnalyzer import add_indicators, analyze_stock, sort_results_by_priority
+from data_snapshots import current_generation
+
+# 패널에 저장하는 가격 필드 순서
+PANEL_FIELDS = ["Open", "High", "Low", "Close", "Volume", "Adj Close"]
+
+
+class PricePanel:
+    """
+    모든 종목의 OHLCV 를 (종목 × 일자 × 필드) 형태의 연속된 float64 배열 하나에 담은 패널.
+    배열은 multiprocessing.shared_memory 또는 메모리 맵 파일에 위치하므로
+    워커 프로세스는 handle 만 전달받아 복사 없이 같은 데이터를 읽을 수 있습니다.
+
+    index: {종목코드: (행 번호, 데이터 길이, 종목명)} - 각 종목의 데이터는 행의 0번 위치부터 채워짐
+    """
+
+    def __init__(self, values, dates, index, backend, location, shm=None):
+        self.values = values  # (tickers, days, fields) float64
+        self.dates = dates  # (tickers, days) int64 (datetime64[ns] 값)
+        self.index = index
+        self.backend = backend
+        self.location = location
+        self._shm = shm
+
+    @staticmethod
+    def _layout(num_tickers, num_days):
+        values_shape = (num_tickers, num_days, len(PANEL_FIELDS))
+        values_bytes = int(np.prod(values_shape)) * 8
+        dates_bytes = num_tickers * num_days * 8
+        return values_shape, values_bytes, values_bytes + dates_bytes
+
+    @classmethod
+    def _map_buffer(cls, buffer, num_tickers, num_days):
+        values_shape, values_bytes, _ = cls._layout(num_tickers, num_days)
+        values = np.ndarray(values_shape, dtype=np.float64, buffer=buffer)
+        dates = np.ndarray((num_tickers, num_days), dtype=np.int64, buffer=buffer, offset=values_bytes)
+        return values, dates
+
+    @classmethod
+    def from_frames(cls, frames, backend="shm", mmap_path=None):
+        """
+        종목별 데이터프레임 목록으로 패널을 생성합니다.
+        Args:
+            frames (list): Date, StockName, StockCode, OHLCV 컬럼을 가진 데이터프레임 목록
+            backend (str): "shm"(공유 메모리) 또는 "mmap"(메모리 맵 파일)
+            mmap_path (str): backend 가 "mmap" 일 때 사용할 파일 경로
+        """
+        num_tickers = len(frames)
+        num_days = max((len(df) for df in frames), default=0) or 1
+        _, _, total_bytes = cls._layout(num_tickers, num_days)
+
+        shm = None
+        if backend == "shm":
+            shm = shared_memory.SharedMemory(create=True, size=max(total_bytes, 1))
+            buffer, location = shm.buf, shm.name
+        elif backend == "mmap":
+            if not mmap_path:
+                raise ValueError("mmap backend 에는 mmap_path 가 필요합니다.")
+            buffer = np.memmap(mmap_path, dtype=np.uint8, mode="w+", shape=(max(total_bytes, 1),))
+            location = mmap_path
+        else:
+            raise ValueError(f"지원하지 않는 backend: {backend}")
+
+        values, dates = cls._map_buffer(buffer, num_tickers, num_days)
+        values[:] = np.nan
+        dates[:] = 0
+
+        index = {}
+        for row, df in enumerate(frames):
+            length = len(df)
+            values[row, :length, :] = df[PANEL_FIELDS].to_numpy(dtype=np.float64)
+            dates[row, :length] = df["Date"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+            code = str(df["StockCode"].iloc[0])
+            index[code] = (row, length, df["StockName"].iloc[0])
+
+        if backend == "mmap":
+            buffer.flush()
+
+        return cls(values, dates, index, backend, location, shm)
+
+    @classmethod
+    def from_folder(cls, input_folder, backend="shm", mmap_path=None):
+        """
+        analyze_stocks_with_combined_logic 과 같은 CSV 폴더를 읽어 패널을 생성합니다.
+        스냅샷 루트를 주면 현재 스냅샷(current)을 읽습니다.
+        """
+        input_folder = current_generation(input_folder)
+        frames = []
+        for file in sorted(os.listdir(input_folder)):
+            if not file.endswith(".csv"):
+                continue
+            stock_data = pd.read_csv(os.path.join(input_folder, file))
+            stock_data["Date"] = pd.to_datetime(stock_data["Date"])
+            for _, stock_df in stock_data.groupby("StockName", sort=False):
+                frames.append(stock_df.sort_values("Date"))
+        return cls.from_frames(frames, backend, mmap_path)
+
+    def handle(self):
+        """
+        다른 프로세스에서 attach 할 때 필요한 정보 (작고 pickle 가능한 dict)
+        """
+        num_tickers, num_days, _ = self.values.shape
+        return {
+            "backend": self.backend,
+            "location": self.location,
+            "num_tickers": num_tickers,
+            "num_days": num_days,
+            "index": self.index,
+        }
+
+    @classmethod
+    def attach(cls, handle):
+        """
+        handle 로 기존 패널에 읽기 전용으로 연결합니다 (데이터 복사 없음).
+        """
+        shm = None
+        if handle["backend"] == "shm":
+            shm = shared_memory.SharedMemory(name=handle["location"])
+            buffer = shm.buf
+        else:
+            buffer = np.memmap(handle["location"], dtype=np.uint8, mode="r")
+
+        values, dates = cls._map_buffer(buffer, handle["num_tickers"], handle["num_days"])
+        values.setflags(write=False)
+        dates.setflags(write=False)
+        return cls(values, dates, handle["index"], handle["backend"], handle["location"], shm)
+
+    def codes(self):
+        return list(self.index)
+
+    def frame(self, code):
+        """
+        종목 하나의 데이터프레임. 가격 컬럼은 패널 배열의 view 이므로 복사가 일어나지 않습니다.
+        Volume 은 CSV 를 직접 읽을 때와 같은 결과가 나오도록 정수형으로 되돌립니다 (이 컬럼만 복사).
+        """
+        row, length, name = self.index[code]
+        stock_df = pd.DataFrame(self.values[row, :length, :], columns=PANEL_FIELDS, copy=False)
+        if not stock_df["Volume"].isna().any():
+            stock_df["Volume"] = stock_df["Volume"].astype("int64")
+        stock_df.insert(0, "Date", pd.to_datetime(self.dates[row, :length]))
+        stock_df.insert(1, "StockName", name)
+        stock_df.insert(2, "StockCode", code)
+        return stock_df
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    def unlink(self):
+        """
+        패널을 만든 프로세스에서 사용 종료 후 호출 (공유 메모리/파일 해제)
+        """
+        if self.backend == "shm":
+            shm = self._shm or shared_memory.SharedMemory(name=self.location)
+            shm.close()
+            shm.unlink()
+            self._shm = None
+        elif os.path.exists(self.location):
+            os.remove(self.location)
+
+
+# 워커 프로세스마다 한 번만 attach 하여 재사용
+_worker_panel = None
+
+
+def _init_worker(handle):
+    global _worker_panel
+    _worker_panel = PricePanel.attach(handle)
+
+
+def _analyze_code(code):
+    stock_df = add_indicators(_worker_panel.frame(code))
+    return analyze_stock(stock_df["StockName"].iloc[0], stock_df)
+
+
+def _analyze_frame(stock_df):
+    stock_df = add_indicators(stock_df)
+    return analyze_stock(stock_df["StockName"].iloc[0], stock_df)
+
+
+def analyze_panel_parallel(panel, output_path=None, workers=None):
+    """
+    패널을 여러 워커 프로세스에서 분석합니다.
+    워커에는 종목 코드만 전달되고 결과로는 결과 한 행(dict)만 돌아옵니다.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(panel.handle(),)) as pool:
+        all_results = list(pool.map(_analyze_code, panel.codes(), chunksize=8))
+
+    results_df = sort_results_by_priority(pd.DataFrame(all_results))
+    if output_path:
+        results_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+        print(f"Analysis saved to {output_path}")
+    return results_df
+
+
+def _peak_rss_mb():
+    # Linux 기준 ru_maxrss 단위는 KB
+    self_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return self_rss / 1024, children_rss / 1024
+
+
+def benchmark(input_folder, workers=None, mode="panel"):
+    """
+    DataFrame 을 pickle 하여 워커에 전달하는 방식(frames)과 공유 패널 방식(panel)을 비교합니다.
+    ru_maxrss 는 프로세스 생애 동안의 최대값이므로 방식별로 별도 프로세스에서 실행해야 합니다.
+    """
+    input_folder = current_generation(input_folder)
+    load_started = time.perf_counter()
+    if mode == "frames":
+        panel = None
+        frames = []
+        for file in sorted(os.listdir(input_folder)):
+            if file.endswith(".csv"):
+                stock_data = pd.read_csv(os.path.join(input_folder, file))
+                stock_data["Date"] = pd.to_datetime(stock_data["Date"])
+                frames.extend(df.sort_values("Date") for _, df in stock_data.groupby("StockName", sort=False))
+        payloads = frames
+    else:
+        panel = PricePanel.from_folder(input_folder)
+        payloads = panel.codes()
+    load_time = time.perf_counter() - load_started
+
+    # 워커로 전달되는 데이터 크기와 직렬화 시간
+    serialize_started = time.perf_counter()
+    transfer_bytes = sum(len(pickle.dumps(p)) for p in payloads)
+    if panel is not None:
+        transfer_bytes += len(pickle.dumps(panel.handle()))
+    serialize_time = time.perf_counter() - serialize_started
+
+    run_started = time.perf_counter()
+    try:
+        if panel is None:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_analyze_frame, payloads, chunksize=8))
+        else:
+            results = analyze_panel_parallel(panel, workers=workers)
+    finally:
+        if panel is not None:
+            panel.unlink()
+    run_time = time.perf_counter() - run_started
+
+    parent_rss, child_rss = _peak_rss_mb()
+    print(f"[{mode}] 종목 {len(results)}개, 로드 {load_time:.3f}s, "
+          f"전송 {transfer_bytes / 1024 / 1024:.2f}MB (직렬화 {serialize_time:.3f}s), 분석 {run_time:.3f}s, "
+          f"최대 RSS 부모 {parent_rss:.1f}MB / 워커 {child_rss:.1f}MB")
+
+
+# 벤치마크 실행: python price_panel.py [frames|panel] [입력 폴더 또는 스냅샷 루트] [워커 수]
+if __name__ == "__main__":
+    mode = sys.argv[1] if len(sys.argv) > 1 else "panel"
+    input_folder = sys.argv[2] if len(sys.argv) > 2 else os.path.join(os.getcwd(), "korea_stocks_data_parts")
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    benchmark(input_folder, workers, mode)
@@ -0,0 +1,265 @@
+import os
+import io
+import gzip
+import json
+import shutil
+import hashlib
+import importlib
+import importlib.util
+from datetime import datetime, timezone
+
+# 분석 결과 아티팩트 폴더 구조
+#   korea_analysis_artifacts/
+#       v20261019153500123456/
+#           korea_analysis_combined.csv, .csv.gz, .csv.br, .json(.gz/.br), .arrow(.gz/.br), manifest.json
+#       latest.json   <- 최신 버전 manifest (원자적 교체)
+ARTIFACT_NAME = "korea_analysis_combined"
+LATEST_MANIFEST = "latest.json"
+
+FORMATS = {
+    "csv": {"extension": "csv", "mimetype": "text/csv; charset=utf-8"},
+    "json": {"extension": "json", "mimetype": "application/json"},
+    "arrow": {"extension": "arrow", "mimetype": "application/vnd.apache.arrow.stream"},
+}
+
+# Accept-Encoding 의 q 값이 같을 때 선호 순서
+ENCODING_PREFERENCE = ["br", "gzip", "identity"]
+ENCODING_SUFFIX = {"identity": "", "gzip": ".gz", "br": ".br"}
+
+
+def _optional_module(name):
+    """
+    선택 의존성(pyarrow, brotli)은 아티팩트를 만들 때만 import 합니다.
+    서빙 경로(app 시작)는 manifest 만 읽으므로 무거운 모듈을 불러오지 않습니다.
+    """
+    if importlib.util.find_spec(name) is None:
+        return None
+    return importlib.import_module(name)
+
+
+def _render(results_df, fmt):
+    if fmt == "csv":
+        return results_df.to_csv(index=False).encode("utf-8-sig")
+    if fmt == "json":
+        return results_df.to_json(orient="records", force_ascii=False, date_format="iso").encode("utf-8")
+    if fmt == "arrow":
+        pa = _optional_module("pyarrow")
+        table = pa.Table.from_pandas(results_df, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    raise ValueError(f"지원하지 않는 형식: {fmt}")
+
+
+def _compress(data, encoding):
+    if encoding == "identity":
+        return data
+    if encoding == "gzip":
+        # mtime 을 고정해야 같은 내용이면 같은 바이트(같은 ETag)가 됨
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br":
+        return _optional_module("brotli").compress(data, quality=11)
+    raise ValueError(f"지원하지 않는 인코딩: {encoding}")
+
+
+def available_formats():
+    # 선택 의존성이 없으면 해당 형식/압축만 생략 (find_spec 은 모듈을 import 하지 않음)
+    return [fmt for fmt in FORMATS if fmt != "arrow" or importlib.util.find_spec("pyarrow") is not None]
+
+
+def available_encodings():
+    return [encoding for encoding in ENCODING_PREFERENCE
+            if encoding != "br" or importlib.util.find_spec("brotli") is not None]
+
+
+def source_signature(path):
+    """
+    결과 CSV 의 (크기, 수정 시각) 서명. 파일이 없으면 None.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def write_result_artifacts(results_df, artifact_root, version=None, keep=3, source_path=None):
+    """
+    분석 결과를 CSV/JSON/Arrow 로 변환하고 gzip/brotli 로 미리 압축하여 버전 폴더에 저장합니다.
+    각 파일의 강한 ETag(내용 sha256)를 manifest 에 기록한 뒤 latest.json 을 원자적으로 교체합니다.
+    source_path 를 주면 같은 결과로 쓴 CSV 의 서명을 기록하여, 이후 CSV 만 다시 쓰인 경우
+    is_manifest_current 로 아티팩트가 오래되었음을 알 수 있습니다.
+    Returns:
+        dict: manifest
+    """
+    manifest, version_dir = _new_version(artifact_root, version, len(results_df), source_path)
+
+    for fmt in available_formats():
+        raw = _render(results_df, fmt)
+        variants = {}
+        for encoding in available_encodings():
+            data = _compress(raw, encoding)
+            file_name = f"{ARTIFACT_NAME}.{FORMATS[fmt]['extension']}{ENCODING_SUFFIX[encoding]}"
+            with open(os.path.join(version_dir, file_name), "wb") as f:
+                f.write(data)
+            variants[encoding] = {
+                "file": file_name,
+                "size": len(data),
+                "etag": hashlib.sha256(data).hexdigest()[:32],
+            }
+        manifest["formats"][fmt] = {"mimetype": FORMATS[fmt]["mimetype"], "variants": variants}
+
+    return _publish_manifest(manifest, artifact_root, version_dir, keep)
+
+
+def write_csv_file_artifacts(csv_path, artifact_root, rows, version=None, keep=3):
+    """
+    이미 저장된 결과 CSV 파일을 청크 단위로 읽어 CSV 아티팩트(원본, gzip, brotli)만 만듭니다.
+    결과 전체를 메모리에 올리지 않으므로 스트리밍 분석(analyze_stocks_streaming)에서 사용하며,
+    JSON/Arrow 형식은 만들지 않습니다 (요청 시 404).
+    Returns:
+        dict: manifest
+    """
+    manifest, version_dir = _new_version(artifact_root, version, rows, csv_path)
+
+    variants = {}
+    for encoding in available_encodings():
+        file_name = f"{ARTIFACT_NAME}.{FORMATS['csv']['extension']}{ENCODING_SUFFIX[encoding]}"
+        target_path = os.path.join(version_dir, file_name)
+        _compress_file(csv_path, target_path, encoding)
+        variants[encoding] = {
+            "file": file_name,
+            "size": os.path.getsize(target_path),
+            "etag": _file_sha256(target_path)[:32],
+        }
+    manifest["formats"]["csv"] = {"mimetype": FORMATS["csv"]["mimetype"], "variants": variants}
+
+    return _publish_manifest(manifest, artifact_root, version_dir, keep)
+
+
+def _compress_file(source_path, target_path, encoding, chunk_size=1024 * 1024):
+    if encoding == "identity":
+        shutil.copyfile(source_path, target_path)
+        return
+    with open(source_path, "rb") as source, open(target_path, "wb") as target:
+        if encoding == "gzip":
+            with gzip.GzipFile(filename="", mode="wb", fileobj=target, compresslevel=9, mtime=0) as compressed:
+                shutil.copyfileobj(source, compressed, chunk_size)
+        elif encoding == "br":
+            compressor = _optional_module("brotli").Compressor(quality=11)
+            for chunk in iter(lambda: source.read(chunk_size), b""):
+                target.write(compressor.process(chunk))
+            target.write(compressor.finish())
+        else:
+            raise ValueError(f"지원하지 않는 인코딩: {encoding}")
+
+
+def _file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _new_version(artifact_root, version, rows, source_path):
+    version = version or f"v{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+    version_dir = os.path.join(artifact_root, version)
+    os.makedirs(version_dir, exist_ok=True)
+    manifest = {
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "rows": rows,
+        "source": source_signature(source_path) if source_path else None,
+        "formats": {},
+    }
+    return manifest, version_dir
+
+
+def _publish_manifest(manifest, artifact_root, version_dir, keep):
+    """
+    manifest 를 버전 폴더에 저장하고 latest.json 을 원자적으로 교체한 뒤 오래된 버전을 정리합니다.
+    """
+    with open(os.path.join(version_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    tmp_path = os.path.join(artifact_root, f".{LATEST_MANIFEST}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(artifact_root, LATEST_MANIFEST))
+    print(f"분석 결과 아티팩트 저장 완료: {version_dir}")
+
+    # 오래된 버전 정리 (다운로드 중일 수 있으므로 최신 keep 개 유지)
+    versions = sorted(name for name in os.listdir(artifact_root)
+                      if name.startswith("v") and os.path.isdir(os.path.join(artifact_root, name)))
+    for name in versions[:-keep]:
+        shutil.rmtree(os.path.join(artifact_root, name), ignore_errors=True)
+
+    return manifest
+
+
+def load_latest_manifest(artifact_root):
+    try:
+        with open(os.path.join(artifact_root, LATEST_MANIFEST), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def is_manifest_current(manifest, source_path):
+    """
+    manifest 가 현재 결과 CSV 로부터 만들어졌는지 확인합니다.
+    CSV 를 아티팩트 없이 다시 쓰는 경로(스트리밍 분석, 샤드 병합 등)가 실행되면 False.
+    """
+    recorded = manifest.get("source")
+    return recorded is not None and recorded == source_signature(source_path)
+
+
+def parse_accept_encoding(header):
+    """
+    Accept-Encoding 헤더를 {인코딩: q 값} 으로 변환합니다 (identity 는 명시하지 않으면 허용).
+    """
+    accepted = {}
+    for part in (header or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    if "identity" not in accepted:
+        accepted["identity"] = accepted.get("*", 1.0) if "*" in accepted else 1.0
+    return accepted
+
+
+def select_variant(manifest, fmt, accept_encoding):
+    """
+    요청 형식과 Accept-Encoding 에 맞는 미리 압축된 파일을 선택합니다.
+    Returns:
+        (encoding, variant dict) 또는 형식이 없거나 허용되는 인코딩이 없으면 None
+        (두 경우를 구분해야 하면 호출 전에 manifest["formats"] 에 형식이 있는지 확인)
+    """
+    entry = manifest["formats"].get(fmt)
+    if entry is None:
+        return None
+
+    accepted = parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = [
+        (accepted.get(encoding, wildcard), -ENCODING_PREFERENCE.index(encoding), encoding)
+        for encoding in entry["variants"]
+    ]
+    candidates = [c for c in candidates if c[0] > 0]
+    if not candidates:
+        return None
+
+    _, _, encoding = max(candidates)
+    return encoding, entry["variants"][encoding]
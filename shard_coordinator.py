@@ -0,0 +1,333 @@
+"""
+종목 유니버스를 해시 기반 샤드로 나누어 여러 워커(프로세스/노드)가 다운로드와 분석을 나눠 처리합니다.
+워커들은 작업 디렉토리의 SQLite 큐에서 샤드를 하나씩 가져가며,
+모든 샤드가 끝나면 샤드별 결과를 하나의 우선순위 정렬 결과로 합칩니다.
+
+여러 노드에서 실행할 때는 작업 디렉토리를 공유 디스크에 두고 각 노드에서 worker 명령을 실행합니다.
+
+예시:
+    python shard_coordinator.py run --work-dir shards --shards 16 --workers 4
+    # 또는 단계별 실행
+    python shard_coordinator.py init --work-dir shards --shards 16 --universe universe.csv
+    python shard_coordinator.py worker --work-dir shards     # 노드마다 실행
+    python shard_coordinator.py merge --work-dir shards --output korea_analysis_combined.csv
+"""
+import os
+import sys
+import time
+import zlib
+import socket
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+
+from stock_codes import load_stock_codes
+
+QUEUE_FILE = "queue.sqlite3"
+
+# 이 시간(초) 동안 임대가 갱신되지 않은 샤드는 워커가 죽은 것으로 보고 다시 배정
+# (처리 중인 워커는 임대 시간의 1/3 마다 claimed_at 을 갱신)
+DEFAULT_LEASE_SECONDS = 30 * 60
+
+
+class LeaseLostError(RuntimeError):
+    """
+    처리 중인 샤드가 임대 만료로 다른 워커에 재배정되었을 때 발생
+    """
+
+
+def shard_of(code, num_shards):
+    """
+    종목 코드를 안정적인 해시(crc32)로 샤드 번호에 매핑합니다 (프로세스/노드와 무관하게 동일).
+    """
+    return zlib.crc32(code.encode("utf-8")) % num_shards
+
+
+def partition_codes(stock_codes, num_shards):
+    shards = [{} for _ in range(num_shards)]
+    for code, name in stock_codes.items():
+        shards[shard_of(code, num_shards)][code] = name
+    return shards
+
+
+def connect_queue(work_dir):
+    conn = sqlite3.connect(os.path.join(work_dir, QUEUE_FILE), timeout=60, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def init_queue(work_dir, num_shards, universe_file=None):
+    """
+    작업 디렉토리와 샤드 큐를 초기화합니다 (기존 큐는 새로 만듦).
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    conn = connect_queue(work_dir)
+    conn.execute("DROP TABLE IF EXISTS shards")
+    conn.execute("DROP TABLE IF EXISTS meta")
+    conn.execute("""
+        CREATE TABLE shards (
+            shard INTEGER PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'pending',
+            worker TEXT,
+            claimed_at REAL,
+            finished_at REAL,
+            error TEXT
+        )
+    """)
+    conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+        ("num_shards", str(num_shards)),
+        ("universe_file", os.path.abspath(universe_file) if universe_file else ""),
+    ])
+    conn.executemany("INSERT INTO shards (shard) VALUES (?)", [(i,) for i in range(num_shards)])
+    conn.close()
+    print(f"샤드 큐 초기화 완료: {work_dir} ({num_shards}개)")
+
+
+def read_meta(conn):
+    return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+
+
+def claim_shard(conn, worker_id, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """
+    대기 중이거나 임대 시간이 지난 샤드 하나를 가져갑니다. 없으면 None.
+    """
+    now = time.time()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT shard FROM shards WHERE status = 'pending' "
+            "OR (status = 'running' AND claimed_at < ?) ORDER BY shard LIMIT 1",
+            (now - lease_seconds,),
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE shards SET status = 'running', worker = ?, claimed_at = ?, error = NULL WHERE shard = ?",
+            (worker_id, now, row[0]),
+        )
+        conn.execute("COMMIT")
+        return row[0]
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def renew_lease(conn, shard, worker_id):
+    """
+    처리 중인 샤드의 임대 시각을 갱신합니다. 다른 워커에게 재배정되었으면 False.
+    """
+    cursor = conn.execute(
+        "UPDATE shards SET claimed_at = ? WHERE shard = ? AND worker = ? AND status = 'running'",
+        (time.time(), shard, worker_id),
+    )
+    return cursor.rowcount > 0
+
+
+def _heartbeat(work_dir, shard, worker_id, interval, stop):
+    conn = connect_queue(work_dir)
+    try:
+        while not stop.wait(interval):
+            if not renew_lease(conn, shard, worker_id):
+                print(f"[{worker_id}] 샤드 {shard} 임대를 잃었습니다 (다른 워커에 재배정됨).")
+                break
+    finally:
+        conn.close()
+
+
+def finish_shard(conn, shard, worker_id, error=None):
+    """
+    샤드 상태를 완료/실패로 기록합니다.
+    임대가 만료되어 다른 워커가 가져간 샤드는 덮어쓰지 않고 False 를 반환합니다.
+    """
+    cursor = conn.execute(
+        "UPDATE shards SET status = ?, finished_at = ?, error = ? "
+        "WHERE shard = ? AND worker = ? AND status = 'running'",
+        ("failed" if error else "done", time.time(), error, shard, worker_id),
+    )
+    if cursor.rowcount == 0:
+        print(f"[{worker_id}] 샤드 {shard} 는 다른 워커에 재배정되어 결과를 기록하지 않습니다.")
+        return False
+    return True
+
+
+def shard_result_path(work_dir, shard):
+    return os.path.join(work_dir, "results", f"shard-{shard:04d}.csv")
+
+
+def process_shard(work_dir, shard, stock_codes, still_owner=None):
+    """
+    샤드 하나의 종목을 다운로드(스냅샷)하고 분석하여 샤드 결과 CSV 를 저장합니다.
+    still_owner 는 스냅샷 교체와 결과 파일 교체 직전에 호출되며, False 이면
+    (다른 워커가 샤드를 가져감) 아무것도 반영하지 않고 LeaseLostError 를 발생시킵니다.
+    """
+    from korea_stock_downloader import fetch_yahoo_finance_data
+    from stockAnalyzer import analyze_stocks_with_combined_logic
+    from data_snapshots import current_generation, begin_generation, commit_generation, discard_generation
+
+    data_root = os.path.join(work_dir, "data", f"shard-{shard:04d}")
+    result_path = shard_result_path(work_dir, shard)
+    os.makedirs(os.path.dirname(result_path), exist_ok=True)
+
+    generation = begin_generation(data_root)
+    try:
+        summary = fetch_yahoo_finance_data(stock_codes, generation)
+    except Exception:
+        discard_generation(generation)
+        raise
+
+    if summary["updated"]:
+        if still_owner is not None and not still_owner():
+            discard_generation(generation)
+            raise LeaseLostError(f"샤드 {shard} 임대를 잃어 스냅샷을 반영하지 않습니다.")
+        commit_generation(data_root, generation)
+    else:
+        discard_generation(generation)
+        if os.path.exists(result_path):
+            return summary
+
+    input_folder = current_generation(data_root)
+    if any(f.endswith(".csv") for f in os.listdir(input_folder)):
+        # 같은 샤드를 가진 다른 워커와 임시 파일이 겹치지 않도록 프로세스별 경로에 쓴 뒤 교체
+        partial_path = f"{result_path}.{os.getpid()}.partial"
+        analyze_stocks_with_combined_logic(input_folder, partial_path)
+        if still_owner is not None and not still_owner():
+            os.remove(partial_path)
+            raise LeaseLostError(f"샤드 {shard} 임대를 잃어 결과를 반영하지 않습니다.")
+        os.replace(partial_path, result_path)
+    return summary
+
+
+def run_worker(work_dir, worker_id=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """
+    큐에 남은 샤드가 없을 때까지 샤드를 가져와 처리합니다.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    conn = connect_queue(work_dir)
+    meta = read_meta(conn)
+    num_shards = int(meta["num_shards"])
+    shards = partition_codes(load_stock_codes(meta["universe_file"] or None), num_shards)
+
+    processed = 0
+    while True:
+        shard = claim_shard(conn, worker_id, lease_seconds)
+        if shard is None:
+            break
+
+        # 처리 시간이 임대 시간을 넘어도 다른 워커가 가져가지 않도록 임대 갱신
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=_heartbeat, args=(work_dir, shard, worker_id, lease_seconds / 3, stop),
+                                     daemon=True)
+        heartbeat.start()
+
+        started = time.perf_counter()
+        try:
+            if shards[shard]:
+                process_shard(work_dir, shard, shards[shard],
+                              still_owner=lambda: renew_lease(conn, shard, worker_id))
+            error = None
+        except Exception as e:
+            error = str(e)
+        finally:
+            stop.set()
+            heartbeat.join()
+
+        if finish_shard(conn, shard, worker_id, error=error):
+            if error:
+                print(f"[{worker_id}] 샤드 {shard} 실패: {error}")
+            else:
+                print(f"[{worker_id}] 샤드 {shard} 완료 ({len(shards[shard])}종목, {time.perf_counter() - started:.1f}s)")
+        processed += 1
+
+    conn.close()
+    return processed
+
+
+def merge_results(work_dir, output_path, allow_partial=False):
+    """
+    샤드별 결과를 합쳐 Action 우선순위로 정렬한 최종 결과를 저장합니다.
+    완료되지 않은 샤드가 있으면 allow_partial 이 아닌 한 결과를 쓰지 않고 실패합니다.
+    """
+    import pandas as pd
+    from stockAnalyzer import sort_results_by_priority
+
+    conn = connect_queue(work_dir)
+    statuses = conn.execute("SELECT shard, status, error FROM shards ORDER BY shard").fetchall()
+    conn.close()
+
+    unfinished = [(shard, status, error) for shard, status, error in statuses if status != "done"]
+    for shard, status, error in unfinished:
+        print(f"{'경고' if allow_partial else '에러'}: 샤드 {shard} 상태 {status}{f' ({error})' if error else ''}")
+    if unfinished and not allow_partial:
+        raise RuntimeError(f"완료되지 않은 샤드 {len(unfinished)}개가 있어 병합하지 않습니다 (--allow-partial 로 제외 후 병합).")
+
+    frames = [
+        pd.read_csv(shard_result_path(work_dir, shard), dtype={"stockcode": str})
+        for shard, status, _ in statuses
+        if status == "done" and os.path.exists(shard_result_path(work_dir, shard))
+    ]
+    if not frames:
+        raise RuntimeError("병합할 샤드 결과가 없습니다.")
+
+    results_df = sort_results_by_priority(pd.concat(frames, ignore_index=True))
+
+    tmp_path = f"{output_path}.tmp"
+    results_df.to_csv(tmp_path, index=False, encoding="utf-8-sig")
+    os.replace(tmp_path, output_path)
+    print(f"샤드 결과 병합 완료: {output_path} ({len(results_df)}종목, 샤드 {len(frames)}개)")
+    return results_df
+
+
+def run_local(work_dir, num_shards, workers, output_path, universe_file=None, allow_partial=False):
+    """
+    로컬에서 큐 초기화 → 워커 프로세스 실행 → 결과 병합을 한 번에 수행합니다.
+    """
+    init_queue(work_dir, num_shards, universe_file)
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(work_dir, f"{socket.gethostname()}:worker-{i}"))
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    return merge_results(work_dir, output_path, allow_partial)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="샤드 기반 주식 데이터 다운로드/분석")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("init", "worker", "merge", "run"):
+        sub = subparsers.add_parser(name)
+        sub.add_argument("--work-dir", default="shards")
+        if name in ("init", "run"):
+            sub.add_argument("--shards", type=int, default=8)
+            sub.add_argument("--universe", default=None, help="종목 목록 파일 (CSV/JSON)")
+        if name in ("merge", "run"):
+            sub.add_argument("--output", default="korea_analysis_combined.csv")
+            sub.add_argument("--allow-partial", action="store_true", help="실패/미완료 샤드를 제외하고 병합")
+        if name == "run":
+            sub.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+        if name == "worker":
+            sub.add_argument("--worker-id", default=None)
+            sub.add_argument("--lease-seconds", type=int, default=DEFAULT_LEASE_SECONDS)
+
+    args = parser.parse_args()
+
+    if args.command == "init":
+        init_queue(args.work_dir, args.shards, args.universe)
+    elif args.command == "worker":
+        run_worker(args.work_dir, args.worker_id, args.lease_seconds)
+    elif args.command == "merge":
+        merge_results(args.work_dir, args.output, args.allow_partial)
+    else:
+        run_local(args.work_dir, args.shards, args.workers, args.output, args.universe, args.allow_partial)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import csv
+import json
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+# 변경 여부를 판단하는 기준 컬럼과 종목 식별 컬럼
+KEY_COLUMN = "stockcode"
+COMPARE_COLUMN = "Action"
+
+
+def read_result_rows(csv_path):
+    """
+    분석 결과 CSV 를 {종목코드: 행(dict)} 형태로 읽습니다. 파일이 없으면 빈 dict.
+    pandas 없이 읽으므로 읽기 전용 인스턴스에서도 사용할 수 있습니다.
+    """
+    try:
+        with open(csv_path, encoding="utf-8-sig", newline="") as f:
+            return {row[KEY_COLUMN]: row for row in csv.DictReader(f)}
+    except FileNotFoundError:
+        return {}
+
+
+def read_result_actions(csv_path):
+    """
+    분석 결과 CSV 를 {종목코드: Action} 형태로 읽습니다 (행 전체를 보관하지 않는 스트리밍 비교용).
+    """
+    try:
+        with open(csv_path, encoding="utf-8-sig", newline="") as f:
+            return {row[KEY_COLUMN]: row.get(COMPARE_COLUMN) for row in csv.DictReader(f)}
+    except FileNotFoundError:
+        return {}
+
+
+def diff_result_file(previous_actions, csv_path):
+    """
+    diff_results 와 같은 변경 목록을 만들되 현재 결과 CSV 는 한 행씩 읽어 비교합니다.
+    메모리에는 이전 결과의 {종목코드: Action} 과 변경된 행만 유지합니다.
+    """
+    changes = []
+    seen = set()
+    with open(csv_path, encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            code = row[KEY_COLUMN]
+            seen.add(code)
+            if code not in previous_actions:
+                changes.append({"stockcode": code, "change": "added", "previous_action": None, "row": row})
+            elif previous_actions[code] != row.get(COMPARE_COLUMN):
+                changes.append({"stockcode": code, "change": "changed",
+                                "previous_action": previous_actions[code], "row": row})
+
+    for code, action in previous_actions.items():
+        if code not in seen:
+            changes.append({"stockcode": code, "change": "removed", "previous_action": action, "row": None})
+    return changes
+
+
+def diff_results(previous_rows, current_rows):
+    """
+    이전/현재 결과를 비교하여 Action 이 바뀌었거나 새로 추가/삭제된 종목 목록을 반환합니다.
+    Returns:
+        list: [{"stockcode", "change", "previous_action", "row"}, ...]
+    """
+    changes = []
+    for code, row in current_rows.items():
+        previous = previous_rows.get(code)
+        if previous is None:
+            changes.append({"stockcode": code, "change": "added", "previous_action": None, "row": row})
+        elif previous.get(COMPARE_COLUMN) != row.get(COMPARE_COLUMN):
+            changes.append({"stockcode": code, "change": "changed",
+                            "previous_action": previous.get(COMPARE_COLUMN), "row": row})
+
+    for code, previous in previous_rows.items():
+        if code not in current_rows:
+            changes.append({"stockcode": code, "change": "removed",
+                            "previous_action": previous.get(COMPARE_COLUMN), "row": None})
+    return changes
+
+
+class ChangeLog:
+    """
+    분석 실행마다 변경된 종목만 버전 번호와 함께 보관하는 메모리 내 로그.
+    최대 max_versions 개의 버전만 유지하며, 그보다 오래된 since 요청에는
+    전체 결과를 다시 받아야 한다고(reset) 알려줍니다.
+    프로세스별 로그이므로 다른 프로세스에서 게시한 변경은 보이지 않습니다.
+    """
+
+    def __init__(self, max_versions=100):
+        self.entries = deque(maxlen=max_versions)
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def publish(self, changes):
+        with self.condition:
+            self.version += 1
+            self.entries.append({
+                "version": self.version,
+                "published_at": datetime.now(timezone.utc).isoformat(),
+                "changes": changes,
+            })
+            self.condition.notify_all()
+            return self.version
+
+    def since(self, version):
+        """
+        version 이후의 변경 내역을 반환합니다.
+        Returns:
+            dict: {"version": 최신 버전, "reset": 전체 재다운로드 필요 여부, "entries": [...]}
+        """
+        with self.condition:
+            oldest = self.entries[0]["version"] if self.entries else self.version + 1
+            reset = version < oldest - 1 or version > self.version
+            entries = [entry for entry in self.entries if entry["version"] > version]
+            return {"version": self.version, "reset": reset, "entries": entries}
+
+    def wait_for(self, version, timeout=None):
+        """
+        version 보다 새로운 버전이 나올 때까지 대기합니다 (SSE 스트림용).
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.version > version, timeout=timeout)
+            return self.version
+
+
+def format_sse(entry):
+    """
+    변경 내역 하나를 Server-Sent Events 메시지 형식으로 변환합니다.
+    """
+    data = json.dumps(entry, ensure_ascii=False, default=str)
+    return f"id: {entry['version']}\nevent: changes\ndata: {data}\n\n"
@@ -0,0 +1,153 @@
+import time
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    같은 key 로 동시에 들어온 요청은 먼저 들어온 요청의 계산 하나만 실행하고 결과를 공유합니다.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self.calls[key] = call
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self.lock:
+            return len(self.calls)
+
+
+class TTLCache:
+    """
+    짧은 유효 시간을 가진 응답 캐시 (만료된 항목은 조회 시 제거)
+    """
+
+    def __init__(self, ttl_seconds):
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, count=True):
+        """
+        count=False 이면 hits/misses 통계에 반영하지 않고 조회만 합니다.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and time.monotonic() < entry[0]:
+                if count:
+                    self.hits += 1
+                return entry[1]
+            self.entries.pop(key, None)
+            if count:
+                self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self.lock:
+            # 다른 key 의 만료 항목 정리 (스냅샷이 바뀌면 이전 key 는 다시 조회되지 않음)
+            now = time.monotonic()
+            for stale in [k for k, (expires, _) in self.entries.items() if expires <= now]:
+                del self.entries[stale]
+            self.entries[key] = (now + self.ttl_seconds, value)
+
+    def get_or_compute(self, key, fn, flight):
+        """
+        캐시에 없으면 SingleFlight 로 한 번만 계산하여 캐시에 저장합니다.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def compute():
+            # 바깥 조회에서 이미 miss 로 집계했으므로 다시 세지 않음
+            cached = self.get(key, count=False)
+            if cached is not None:
+                return cached
+            result = fn()
+            self.set(key, result)
+            return result
+
+        return flight.do(key, compute)
+
+
+class RateLimiter:
+    """
+    클라이언트별 토큰 버킷. 분당 rate_per_minute 개, 최대 burst 개까지 연속 허용합니다.
+    rate_per_minute 가 0 이하이면 제한하지 않습니다.
+    가득 찬 버킷은 새 버킷과 같으므로 주기적으로 제거하여 클라이언트 수만큼 메모리가 늘지 않게 합니다.
+    """
+
+    PRUNE_INTERVAL_SECONDS = 60
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.rejected = 0
+        self.last_pruned = time.monotonic()
+
+    def _prune(self, now):
+        full_after = self.burst / self.rate
+        for client in [c for c, (_, updated) in self.buckets.items() if now - updated >= full_after]:
+            del self.buckets[client]
+        self.last_pruned = now
+
+    def allow(self, client):
+        """
+        Returns:
+            (bool, float): 허용 여부와 거부 시 다시 시도할 수 있을 때까지의 대기 시간(초)
+        """
+        if self.rate <= 0:
+            return True, 0.0
+
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_pruned >= self.PRUNE_INTERVAL_SECONDS:
+                self._prune(now)
+            tokens, updated = self.buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1:
+                self.buckets[client] = (tokens - 1, now)
+                return True, 0.0
+            self.buckets[client] = (tokens, now)
+            self.rejected += 1
+            return False, (1 - tokens) / self.rate
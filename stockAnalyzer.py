@@ -1,5 +1,14 @@
 import pandas as pd
 import os
+import sys
+import csv
+import heapq
+import math
+import pickle
+import shutil
+import tempfile
+
+from support_levels import detect_multi_scale_extrema, cluster_levels
 
 def calculate_rsi(data, period=14):
     delta = data['Close'].diff()
@@ -47,23 +56,25 @@ def detect_significant_turning_points(data, window=10, min_gap_percentage=5.0):
         supports (list): [(가격, 날짜), ...] 형태의 지지선 목록
         resistances (list): [(가격, 날짜), ...] 형태의 저항선 목록
     """
-    data = data.reset_index(drop=True)  # 인덱스 초기화
-    data['rolling_max'] = data['Close'].rolling(window=window, center=True).max()
-    data['rolling_min'] = data['Close'].rolling(window=window, center=True).min()
+    # 전체 데이터프레임 복사 대신 필요한 컬럼만 사용 (인덱스 초기화)
+    close = data['Close'].reset_index(drop=True)
+    dates = data['Date'].reset_index(drop=True)
+    rolling_max = close.rolling(window=window, center=True).max()
+    rolling_min = close.rolling(window=window, center=True).min()
     
     supports = []
     resistances = []
 
-    for i in range(window, len(data) - window):
-        current_price = data['Close'].iloc[i]
+    for i in range(window, len(close) - window):
+        current_price = close.iloc[i]
         
         # 저점 (지지선): 최저값과 일치하는 포인트
-        if current_price == data['rolling_min'].iloc[i]:
-            supports.append((current_price, data['Date'].iloc[i]))
+        if current_price == rolling_min.iloc[i]:
+            supports.append((current_price, dates.iloc[i]))
 
         # 고점 (저항선): 최고값과 일치하는 포인트
-        if current_price == data['rolling_max'].iloc[i]:
-            resistances.append((current_price, data['Date'].iloc[i]))
+        if current_price == rolling_max.iloc[i]:
+            resistances.append((current_price, dates.iloc[i]))
 
     # 중복 및 가까운 포인트 필터링
     def filter_points(points):
@@ -106,6 +117,28 @@ def calculate_support_resistance(current_price, supports, resistances, max_level
     return filtered_supports, filtered_resistances
 
 
+def calculate_multi_scale_support_resistance(data, windows=(10, 20, 60, 120), tolerance_percentage=1.5, max_levels=3):
+    """
+    윈도우(시간 스케일)별 지지선과 저항선을 터치 횟수와 함께 계산합니다.
+    Returns:
+        dict: {윈도우: {"supports": [(가격, 터치 횟수, 날짜), ...], "resistances": [...]}}
+              지지선/저항선 모두 현재 가격에서 가까운 순서
+    """
+    current_price = data['Close'].iloc[-1]
+    result = {}
+
+    for window, (supports, resistances) in detect_multi_scale_extrema(data, windows).items():
+        levels = cluster_levels(supports + resistances, tolerance_percentage)
+        below = [level for level in levels if level[0] < current_price]
+        above = [level for level in levels if level[0] > current_price]
+        result[window] = {
+            "supports": below[::-1][:max_levels],
+            "resistances": above[:max_levels],
+        }
+
+    return result
+
+
 def determine_weighted_max_volume_date(stock_df):
     """
     가장 거래량 가중치가 높은 날짜와 해당 날짜의 추세, 거래량, 가격 변동률을 반환
@@ -406,223 +439,464 @@ def determine_action_with_all_factors(
     return action, message
 
 
-def analyze_stocks_with_combined_logic(input_folder, output_path):
-    all_results = []
+# 메모리 절약 모드에서 사용하는 컬럼 타입
+LEAN_PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close']
+LEAN_CATEGORY_COLUMNS = ['StockName', 'StockCode']
+LEAN_RESULT_CATEGORY_COLUMNS = [
+    'stockname', 'stockcode', 'Price_Change_Status', 'Action', 'Candle_Pattern', 'MACD_Trend',
+    'RSI_Status', 'Volume_Trend', 'Price_vs_Bollinger', 'Slope_5', 'Slope_20', 'Slope_60', 'Slope_120',
+    'Recent_Max_Volume_Trend',
+]
 
-    # 폴더 내 모든 CSV 파일 읽기
-    input_files = [os.path.join(input_folder, f) for f in os.listdir(input_folder) if f.endswith('.csv')]
+# 사용 후 버려도 되는 중간 계산 컬럼
+SCRATCH_COLUMNS = ['rolling_max', 'rolling_min', 'WeightedVolume']
+SCRATCH_COLUMN_PREFIXES = ['MA_']
 
-    for file_path in input_files:
-        stock_data = pd.read_csv(file_path)
-        stock_data['Date'] = pd.to_datetime(stock_data['Date'])
-        stock_data = stock_data.sort_values(['StockName', 'Date'])
 
-        stock_data['RSI'] = calculate_rsi(stock_data)
-        stock_data['MACD'], stock_data['Signal'] = calculate_macd(stock_data)
-        stock_data['UpperBand'], stock_data['MiddleBand'], stock_data['LowerBand'] = calculate_bollinger_bands(stock_data)
-        stock_data = calculate_volume_patterns(stock_data)
+def load_stock_csv(file_path, lean=False):
+    """
+    종목 CSV 를 읽습니다.
+    lean=True 이면 가격은 float32, 거래량은 int64, 종목명/코드는 category 로 변환합니다.
+    """
+    stock_data = pd.read_csv(file_path)
+    stock_data['Date'] = pd.to_datetime(stock_data['Date'])
+
+    if lean:
+        for column in LEAN_PRICE_COLUMNS:
+            if column in stock_data.columns:
+                stock_data[column] = stock_data[column].astype('float32')
+        stock_data['Volume'] = pd.to_numeric(stock_data['Volume'], errors='coerce').fillna(0).astype('int64')
+        for column in LEAN_CATEGORY_COLUMNS:
+            stock_data[column] = stock_data[column].astype('category')
 
-        stock_data['pct_change'] = stock_data['Close'].pct_change().fillna(0) * 100
+    return stock_data
 
-        unique_stocks = stock_data['StockName'].unique()
 
-        for stock in unique_stocks:
-            # 종목별 독립적인 데이터프레임 생성
-            stock_df = stock_data[stock_data['StockName'] == stock].copy()
-            stock_df = stock_df.sort_values('Date')
-
-            # StockCode를 6자리로 맞추기
-            stock_code = stock_df['StockCode'].iloc[0]
-
-
-            # 이동평균 기울기 계산
-            stock_df = calculate_moving_average_slopes(stock_df)
-
-            # 캔들모양
-            candle_patterns = detect_candle_patterns(stock_df)
-            candle_pattern = candle_patterns[-1][1] if candle_patterns else "없음"
-
-            # 최신 데이터 가져오기
-            latest_row = stock_df.iloc[-1]
-            current_price = latest_row['Close']
-            rsi = latest_row['RSI']
-            macd = latest_row['MACD']
-            signal = latest_row['Signal']
-            upper_band = latest_row['UpperBand']
-            middle_band = latest_row['MiddleBand']
-            lower_band = latest_row['LowerBand']
-            volume = latest_row['Volume']
-            volume_change_rate = latest_row['VolumeChangeRate']
-            recent_volume_avg = latest_row['RecentVolumeAvg']
-            pct_change = latest_row['pct_change']
-
-            # 지지와 저항선 계산
-            # supports, resistances = detect_significant_turning_points(stock_df)
-
-
-            supports, resistances = detect_significant_turning_points(stock_df, window=20, min_gap_percentage=3.0)
-
-            # 종목 이름 가져오기
-            stock_name = stock_df['StockName'].iloc[0]  # 첫 번째 행의 'StockName'을 가져옴
-
-            # print(f"\n최근 유용한 지지선 ({stock_name}):")
-            # # 결과 출력
-            # print("\n최근 유용한 지지선:")
-            # for price, date in supports:
-            #     print(f"가격: {price:.2f}, 날짜: {date}")
-
-            # print("\n최근 유용한 저항선:")
-            # for price, date in resistances:
-            #     print(f"가격: {price:.2f}, 날짜: {date}")
-                
-
-            # 지지선과 저항선 통합 후 현재 가격 기준 필터링
-            selected_supports, selected_resistances = calculate_support_resistance(
-                current_price, supports, resistances
-            )
-
-            # print(f"\n최근 유용한 지지선2 ({stock_name}):")
-            # for price, date in selected_supports:
-            #     print(f"가격: {price:.2f}, 날짜: {date}")
-
-            # print(f"\n최근 유용한 저항선2 ({stock_name}):")
-            # for price, date in selected_resistances:
-            #     print(f"가격: {price:.2f}, 날짜: {date}")
-
-            # 액션 및 어드바이스 결정
-            action, advice = determine_action_with_all_factors(
-                current_price, selected_supports, selected_resistances, rsi, macd, signal, upper_band, middle_band,
-                lower_band, volume, stock_df['Volume'], volume_change_rate, recent_volume_avg, pct_change, stock_df, candle_pattern,latest_row['Slope_5'],latest_row['Slope_20']
-            )
-
-            # 디버깅용 Slope 출력
-            # print(f"{stock} 최신 Slope 값:")
-            # print(f"Slope_5: {latest_row['Slope_5']}, Slope_20: {latest_row['Slope_20']}, "
-            #       f"Slope_60: {latest_row['Slope_60']}, Slope_120: {latest_row['Slope_120']}")
-
-
-            # 최근 5일 거래량 가중치 계산
-            recent_days = 5
-            limited_stock_df = stock_df.tail(recent_days)
-            max_weighted_date, max_weighted_trend, max_weighted_volume, max_weighted_pct_change = determine_weighted_max_volume_date(limited_stock_df)
-
-            # 지지선과 저항선을 (가격, 날짜) 형태의 문자열로 저장
-            def format_support_resistance(points, index):
-                # return f"{points[index][0]:.2f} ({points[index][1].date()})" if len(points) > index else None
-                return f"{points[index][0]:.2f}" if len(points) > index else None
-
-            all_results.append({
-                'id': "",
-                'stockname': stock,
-                'stockcode': stock_code,
-                'CurrentPrice': current_price,
-
-                # 현재 가격변화/상승하락/거래량/거래량변동률
-                'Price_Change_Value': pct_change,  # 가격변화
-                'Price_Change_Status': "상승" if pct_change > 0 else "하락",
-                'Volume': volume,
-                'VolumeChangeRate': volume_change_rate,
-
-                'Action': action,
-
-                 #캔들패턴
-                'Candle_Pattern': candle_pattern,
-
-                # 현재 MACD/RSI/거래량 증감/볼린저밴드 위치
-                'MACD_Trend': "상승" if macd > signal else "하락",
-                'RSI_Status': "과매도" if rsi < 30 else "과매수" if rsi > 70 else "중립",
-                'Volume_Trend': "증가" if volume > recent_volume_avg else "감소",
-                'Price_vs_Bollinger': "상단" if current_price > upper_band else "하단" if current_price < lower_band else "중간",
-
-                # 이동평균선
-                'Slope_5': latest_row['Slope_5'],
-                'Slope_20': latest_row['Slope_20'],
-                'Slope_60': latest_row['Slope_60'],
-                'Slope_120': latest_row['Slope_120'],
-
-                # 최근 거래 많은 날 날짜/가격/상승하락/거래량
-                'Recent_Max_Volume_Date': max_weighted_date,  # 최근 5일 기준 날짜
-                'Recent_Max_Volume_Change': max_weighted_pct_change,  # 가격변화
-                'Recent_Max_Volume_Trend': max_weighted_trend,  # 상승/하락 여부
-                'Recent_Max_Volume_Value': max_weighted_volume,  # 거래량
-
-                # 지지선
-                'Support_1': format_support_resistance(selected_supports, 0),
-                'Support_2': format_support_resistance(selected_supports, 1),
-                'Support_3': format_support_resistance(selected_supports, 2),
-
-                # 저항선
-                'Resistance_1': format_support_resistance(selected_resistances, 0),
-                'Resistance_2': format_support_resistance(selected_resistances, 1),
-                'Resistance_3': format_support_resistance(selected_resistances, 2)
-            })
-  
-
-    # 모든 결과를 하나의 데이터프레임으로 변환
-    results_df = pd.DataFrame(all_results)
-
-    # Define priority mapping for actions
-    action_priority = {
-        # 매수 강한
-        "매수 적극 고려(장대양봉 확인, 강한 상승 추세)": 10,
-        "매수 고려(거래량 급증, 강한 상승)": 20,
-        "매수 고려(반등 가능성 높음)": 30,
-        "매수 고려(볼린저 하단 근처, RSI 중립 이하)": 40,
-        "매수 고려(이동평균선 상승, 추세 강화 가능성)": 50,
-        "매수 고려(이동평균선 상승 일치)": 60,
-        "매수 고려(과매도 상태, 반등 가능성)": 70,
-
-        # 매수 대기
-        "매수 대기(과매도, 거래량 부족)": 80,
-        "매수 대기(돌파 가능성)": 90,
-        "매수 대기(RSI 상승, 추세 확인 필요)": 100,
-
-        # 관망
-        "관망(볼린저 상단, RSI 중립 상단)": 110,
-        "관망(과매수 상태, 거래량 감소)": 120,
-        "관망(추세 확인 필요)": 130,
-        "관망(추세 강화 가능성)": 140,
-        "관망(하락 중 거래량 급증, 추세 확인 필요)": 150,
-        "관망(단기 하락세, 추세 확인 필요)": 160,
-        "관망(볼린저 중간선, 신호 부족)": 170,
-        "관망(볼린저 하단, 신호 부족)": 180,
-        "관망(거래량 감소)": 190,
-        "관망(추세 약화 가능성)": 200,
-        "관망(조정 가능성)": 210,
-        "관망(추가 하락 가능성)": 220,
-
-        # 매도 약한
-        "매도 고려(과매수, 거래량 급증)": 230,
-        "매도 고려(위꼬리 긴 음봉, 과매수 상태)": 240,
-
-        # 매도 강한
-        "매도 고려(상승 피로 누적)": 250
+def drop_scratch_columns(data):
+    """
+    rolling_max, MA_*, WeightedVolume 처럼 계산이 끝난 중간 컬럼을 제거합니다.
+    """
+    scratch = [
+        column for column in data.columns
+        if column in SCRATCH_COLUMNS or any(column.startswith(prefix) for prefix in SCRATCH_COLUMN_PREFIXES)
+    ]
+    return data.drop(columns=scratch)
+
+
+def compact_results(results_df):
+    """
+    결과 프레임에서 반복되는 문자열 컬럼(종목명/코드/Action/패턴 등)을 category 로 변환합니다.
+    """
+    for column in LEAN_RESULT_CATEGORY_COLUMNS:
+        if column in results_df.columns:
+            results_df[column] = results_df[column].astype('category')
+    return results_df
+
+
+def frame_memory_bytes(data):
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+
+def report_memory_footprint(ticker_bytes, results_df):
+    """
+    종목별/전체 메모리 사용량을 출력합니다.
+    Args:
+        ticker_bytes (dict): {종목명: 바이트 수}
+        results_df (pd.DataFrame): 결과 프레임
+    """
+    for stock, size in sorted(ticker_bytes.items(), key=lambda x: x[1], reverse=True):
+        print(f"메모리 사용량 - {stock}: {size / 1024:.1f}KB")
+
+    total = sum(ticker_bytes.values())
+    average = total / len(ticker_bytes) if ticker_bytes else 0
+    print(f"전체 종목 데이터: {total / 1024 / 1024:.2f}MB ({len(ticker_bytes)}종목, 평균 {average / 1024:.1f}KB)")
+    print(f"결과 데이터프레임: {frame_memory_bytes(results_df) / 1024:.1f}KB")
+
+
+def add_indicators(stock_data):
+    """
+    분석에 필요한 기본 지표(RSI, MACD, 볼린저 밴드, 거래량, 등락률)를 추가합니다.
+    """
+    stock_data['RSI'] = calculate_rsi(stock_data)
+    stock_data['MACD'], stock_data['Signal'] = calculate_macd(stock_data)
+    stock_data['UpperBand'], stock_data['MiddleBand'], stock_data['LowerBand'] = calculate_bollinger_bands(stock_data)
+    stock_data = calculate_volume_patterns(stock_data)
+
+    stock_data['pct_change'] = stock_data['Close'].pct_change().fillna(0) * 100
+    return stock_data
+
+
+def analyze_stock(stock, stock_df, lean=False, multi_scale=False):
+    """
+    지표가 추가된 단일 종목 데이터프레임을 분석하여 결과 한 행(dict)을 반환합니다.
+    lean=True 이면 기울기 계산 후 MA_* 등 중간 컬럼을 바로 제거합니다.
+    multi_scale=True 이면 스케일별(10/20/60/120봉) 가장 가까운 지지/저항선과 터치 횟수를 추가합니다.
+    """
+    stock_df = stock_df.sort_values('Date')
+
+    # StockCode를 6자리로 맞추기
+    stock_code = stock_df['StockCode'].iloc[0]
+
+
+    # 이동평균 기울기 계산
+    stock_df = calculate_moving_average_slopes(stock_df)
+    if lean:
+        stock_df = drop_scratch_columns(stock_df)
+
+    # 캔들모양
+    candle_patterns = detect_candle_patterns(stock_df)
+    candle_pattern = candle_patterns[-1][1] if candle_patterns else "없음"
+
+    # 최신 데이터 가져오기
+    latest_row = stock_df.iloc[-1]
+    current_price = latest_row['Close']
+    rsi = latest_row['RSI']
+    macd = latest_row['MACD']
+    signal = latest_row['Signal']
+    upper_band = latest_row['UpperBand']
+    middle_band = latest_row['MiddleBand']
+    lower_band = latest_row['LowerBand']
+    volume = latest_row['Volume']
+    volume_change_rate = latest_row['VolumeChangeRate']
+    recent_volume_avg = latest_row['RecentVolumeAvg']
+    pct_change = latest_row['pct_change']
+
+    # 지지와 저항선 계산
+    # supports, resistances = detect_significant_turning_points(stock_df)
+
+
+    supports, resistances = detect_significant_turning_points(stock_df, window=20, min_gap_percentage=3.0)
+
+    # 종목 이름 가져오기
+    stock_name = stock_df['StockName'].iloc[0]  # 첫 번째 행의 'StockName'을 가져옴
+
+    # print(f"\n최근 유용한 지지선 ({stock_name}):")
+    # # 결과 출력
+    # print("\n최근 유용한 지지선:")
+    # for price, date in supports:
+    #     print(f"가격: {price:.2f}, 날짜: {date}")
+
+    # print("\n최근 유용한 저항선:")
+    # for price, date in resistances:
+    #     print(f"가격: {price:.2f}, 날짜: {date}")
+        
+
+    # 지지선과 저항선 통합 후 현재 가격 기준 필터링
+    selected_supports, selected_resistances = calculate_support_resistance(
+        current_price, supports, resistances
+    )
+
+    # print(f"\n최근 유용한 지지선2 ({stock_name}):")
+    # for price, date in selected_supports:
+    #     print(f"가격: {price:.2f}, 날짜: {date}")
+
+    # print(f"\n최근 유용한 저항선2 ({stock_name}):")
+    # for price, date in selected_resistances:
+    #     print(f"가격: {price:.2f}, 날짜: {date}")
+
+    # 액션 및 어드바이스 결정
+    action, advice = determine_action_with_all_factors(
+        current_price, selected_supports, selected_resistances, rsi, macd, signal, upper_band, middle_band,
+        lower_band, volume, stock_df['Volume'], volume_change_rate, recent_volume_avg, pct_change, stock_df, candle_pattern,latest_row['Slope_5'],latest_row['Slope_20']
+    )
+
+    # 디버깅용 Slope 출력
+    # print(f"{stock} 최신 Slope 값:")
+    # print(f"Slope_5: {latest_row['Slope_5']}, Slope_20: {latest_row['Slope_20']}, "
+    #       f"Slope_60: {latest_row['Slope_60']}, Slope_120: {latest_row['Slope_120']}")
+
+
+    # 최근 5일 거래량 가중치 계산
+    recent_days = 5
+    limited_stock_df = stock_df.tail(recent_days)
+    max_weighted_date, max_weighted_trend, max_weighted_volume, max_weighted_pct_change = determine_weighted_max_volume_date(limited_stock_df)
+
+    # 지지선과 저항선을 (가격, 날짜) 형태의 문자열로 저장
+    def format_support_resistance(points, index):
+        # return f"{points[index][0]:.2f} ({points[index][1].date()})" if len(points) > index else None
+        return f"{points[index][0]:.2f}" if len(points) > index else None
+
+    result = {
+        'id': "",
+        'stockname': stock,
+        'stockcode': stock_code,
+        'CurrentPrice': current_price,
+
+        # 현재 가격변화/상승하락/거래량/거래량변동률
+        'Price_Change_Value': pct_change,  # 가격변화
+        'Price_Change_Status': "상승" if pct_change > 0 else "하락",
+        'Volume': volume,
+        'VolumeChangeRate': volume_change_rate,
+
+        'Action': action,
+
+         #캔들패턴
+        'Candle_Pattern': candle_pattern,
+
+        # 현재 MACD/RSI/거래량 증감/볼린저밴드 위치
+        'MACD_Trend': "상승" if macd > signal else "하락",
+        'RSI_Status': "과매도" if rsi < 30 else "과매수" if rsi > 70 else "중립",
+        'Volume_Trend': "증가" if volume > recent_volume_avg else "감소",
+        'Price_vs_Bollinger': "상단" if current_price > upper_band else "하단" if current_price < lower_band else "중간",
+
+        # 이동평균선
+        'Slope_5': latest_row['Slope_5'],
+        'Slope_20': latest_row['Slope_20'],
+        'Slope_60': latest_row['Slope_60'],
+        'Slope_120': latest_row['Slope_120'],
+
+        # 최근 거래 많은 날 날짜/가격/상승하락/거래량
+        'Recent_Max_Volume_Date': max_weighted_date,  # 최근 5일 기준 날짜
+        'Recent_Max_Volume_Change': max_weighted_pct_change,  # 가격변화
+        'Recent_Max_Volume_Trend': max_weighted_trend,  # 상승/하락 여부
+        'Recent_Max_Volume_Value': max_weighted_volume,  # 거래량
+
+        # 지지선
+        'Support_1': format_support_resistance(selected_supports, 0),
+        'Support_2': format_support_resistance(selected_supports, 1),
+        'Support_3': format_support_resistance(selected_supports, 2),
+
+        # 저항선
+        'Resistance_1': format_support_resistance(selected_resistances, 0),
+        'Resistance_2': format_support_resistance(selected_resistances, 1),
+        'Resistance_3': format_support_resistance(selected_resistances, 2)
     }
 
+    # 스케일별 지지선/저항선 (가장 가까운 레벨과 터치 횟수)
+    if multi_scale:
+        for window, levels in calculate_multi_scale_support_resistance(stock_df).items():
+            for kind, points in (('Support', levels['supports']), ('Resistance', levels['resistances'])):
+                result[f'{kind}_{window}'] = format_support_resistance(points, 0)
+                result[f'{kind}_{window}_Touches'] = points[0][1] if points else None
+
+    return result
+
+
+# Define priority mapping for actions
+ACTION_PRIORITY = {
+    # 매수 강한
+    "매수 적극 고려(장대양봉 확인, 강한 상승 추세)": 10,
+    "매수 고려(거래량 급증, 강한 상승)": 20,
+    "매수 고려(반등 가능성 높음)": 30,
+    "매수 고려(볼린저 하단 근처, RSI 중립 이하)": 40,
+    "매수 고려(이동평균선 상승, 추세 강화 가능성)": 50,
+    "매수 고려(이동평균선 상승 일치)": 60,
+    "매수 고려(과매도 상태, 반등 가능성)": 70,
+
+    # 매수 대기
+    "매수 대기(과매도, 거래량 부족)": 80,
+    "매수 대기(돌파 가능성)": 90,
+    "매수 대기(RSI 상승, 추세 확인 필요)": 100,
+
+    # 관망
+    "관망(볼린저 상단, RSI 중립 상단)": 110,
+    "관망(과매수 상태, 거래량 감소)": 120,
+    "관망(추세 확인 필요)": 130,
+    "관망(추세 강화 가능성)": 140,
+    "관망(하락 중 거래량 급증, 추세 확인 필요)": 150,
+    "관망(단기 하락세, 추세 확인 필요)": 160,
+    "관망(볼린저 중간선, 신호 부족)": 170,
+    "관망(볼린저 하단, 신호 부족)": 180,
+    "관망(거래량 감소)": 190,
+    "관망(추세 약화 가능성)": 200,
+    "관망(조정 가능성)": 210,
+    "관망(추가 하락 가능성)": 220,
+
+    # 매도 약한
+    "매도 고려(과매수, 거래량 급증)": 230,
+    "매도 고려(위꼬리 긴 음봉, 과매수 상태)": 240,
+
+    # 매도 강한
+    "매도 고려(상승 피로 누적)": 250
+}
+
+
+def sort_results_by_priority(results_df):
+    """
+    Action 우선순위(오름차순), 현재가(내림차순) 기준으로 결과를 정렬합니다.
+    """
     # Map priority values to a new column
-    results_df['Priority'] = results_df['Action'].map(action_priority)
+    results_df['Priority'] = results_df['Action'].map(ACTION_PRIORITY)
 
     # Sort the results by priority (ascending) and then by CurrentPrice (descending)
     results_df = results_df.sort_values(by=['Priority', 'CurrentPrice'], ascending=[True, False])
 
     # Drop the priority column before saving
     results_df.drop(columns=['Priority'], inplace=True)
+    return results_df
+
+
+def iter_stock_results(input_folder, lean=False, multi_scale=False, ticker_bytes=None):
+    """
+    폴더 내 종목 CSV 를 하나씩 읽어 종목별 분석 결과(dict)를 yield 합니다.
+    한 번에 한 파일의 데이터만 메모리에 유지합니다.
+    Args:
+        ticker_bytes (dict): 주어지면 {종목명: 데이터프레임 메모리 바이트 수}를 기록
+    """
+    # 폴더 내 모든 CSV 파일 읽기
+    input_files = [os.path.join(input_folder, f) for f in os.listdir(input_folder) if f.endswith('.csv')]
+
+    for file_path in input_files:
+        stock_data = load_stock_csv(file_path, lean)
+        stock_data = stock_data.sort_values(['StockName', 'Date'])
+        stock_data = add_indicators(stock_data)
+
+        unique_stocks = stock_data['StockName'].unique()
+
+        for stock in unique_stocks:
+            # 종목별 독립적인 데이터프레임 생성
+            stock_df = stock_data[stock_data['StockName'] == stock].copy()
+            if ticker_bytes is not None:
+                ticker_bytes[stock] = frame_memory_bytes(stock_df)
+            yield analyze_stock(stock, stock_df, lean, multi_scale)
+
+
+def analyze_stocks_with_combined_logic(input_folder, output_path, lean=False, multi_scale=False, artifact_dir=None):
+    """
+    폴더 내 모든 종목 CSV 를 분석하여 우선순위 정렬된 결과를 output_path 에 저장합니다.
+    lean=True 이면 메모리 절약 타입을 사용하고 종목별/전체 메모리 사용량을 출력합니다.
+    multi_scale=True 이면 스케일별 지지/저항선 컬럼을 추가합니다.
+    artifact_dir 를 주면 CSV/JSON/Arrow 와 gzip/brotli 압축본을 버전별로 함께 저장합니다.
+    """
+    ticker_bytes = {} if lean else None
+    all_results = list(iter_stock_results(input_folder, lean, multi_scale, ticker_bytes))
+
+    # 모든 결과를 하나의 데이터프레임으로 변환 후 우선순위 정렬
+    results_df = sort_results_by_priority(pd.DataFrame(all_results))
+    if lean:
+        results_df = compact_results(results_df)
+        report_memory_footprint(ticker_bytes, results_df)
 
     # print("최종 데이터프레임 확인:")
     # print(results_df.columns)
     # print(results_df.tail())      
 
     # Save the sorted results to the output CSV
-    results_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    # (임시 파일 작성 후 교체하여 다운로드 중인 요청이 쓰다 만 파일을 읽지 않도록 함)
+    tmp_path = f"{output_path}.tmp"
+    results_df.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+    os.replace(tmp_path, output_path)
     print(f"Analysis saved to {output_path}")
 
+    if artifact_dir:
+        from result_artifacts import write_result_artifacts
+        write_result_artifacts(results_df, artifact_dir, source_path=output_path)
+
+    return results_df
+
+
+# 우선순위 표에 없는 Action 은 pandas 정렬과 같이 맨 뒤로
+UNMAPPED_PRIORITY = sys.maxsize
+
+
+def _is_missing(value):
+    if value is None:
+        return True
+    try:
+        return math.isnan(value)
+    except TypeError:
+        return False
+
+
+def _price_desc_key(row):
+    # 현재가 내림차순, 값이 없으면 맨 뒤 (sort_values 의 na_position='last' 와 동일)
+    price = row['CurrentPrice']
+    return (1, 0.0) if _is_missing(price) else (0, -float(price))
+
+
+def _format_csv_value(value):
+    if _is_missing(value):
+        return ''
+    if isinstance(value, pd.Timestamp):
+        return value.strftime('%Y-%m-%d') if value == value.normalize() else str(value)
+    return str(value)
+
+
+def _spill_run(rows, path):
+    rows.sort(key=_price_desc_key)
+    with open(path, 'wb') as f:
+        for row in rows:
+            pickle.dump(row, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_run(path):
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def analyze_stocks_streaming(input_folder, output_path, lean=False, multi_scale=False, artifact_dir=None,
+                             run_size=5000, spill_dir=None):
+    """
+    종목 수와 무관하게 일정한 메모리로 분석 결과를 저장하는 스트리밍 모드.
+    결과를 Action 우선순위 버킷별로 최대 run_size 개씩 모아 현재가 순으로 정렬해 디스크에 내려쓴 뒤(run),
+    버킷 순서대로 각 버킷의 run 들을 k-way merge 하여 analyze_stocks_with_combined_logic 과 같은 순서로 씁니다.
+    artifact_dir 를 주면 저장한 CSV 파일로부터 CSV 아티팩트(원본, gzip, brotli)를 함께 만듭니다.
+    Returns:
+        int: 저장한 종목 수
+    """
+    work_dir = tempfile.mkdtemp(prefix='analysis_runs_', dir=spill_dir)
+    buffers = {}
+    runs = {}
+    buffered = 0
+    total = 0
+    columns = None
+
+    def spill():
+        for priority, rows in buffers.items():
+            path = os.path.join(work_dir, f"run-{priority}-{len(runs.get(priority, []))}.pkl")
+            _spill_run(rows, path)
+            runs.setdefault(priority, []).append(path)
+        buffers.clear()
+
+    try:
+        for result in iter_stock_results(input_folder, lean, multi_scale):
+            columns = columns or list(result)
+            priority = ACTION_PRIORITY.get(result['Action'], UNMAPPED_PRIORITY)
+            buffers.setdefault(priority, []).append(result)
+            buffered += 1
+            total += 1
+            if buffered >= run_size:
+                spill()
+                buffered = 0
+        spill()
+
+        # 임시 파일 작성 후 교체
+        tmp_path = f"{output_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            if columns:
+                writer.writerow(columns)
+            for priority in sorted(runs):
+                merged = heapq.merge(*[_read_run(path) for path in runs[priority]], key=_price_desc_key)
+                for row in merged:
+                    writer.writerow([_format_csv_value(row.get(column)) for column in columns])
+        os.replace(tmp_path, output_path)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"Analysis saved to {output_path} ({total} stocks, streaming)")
+
+    if artifact_dir:
+        from result_artifacts import write_csv_file_artifacts
+        write_csv_file_artifacts(output_path, artifact_dir, total)
+
+    return total
+
 
 # 메인 실행 부분 추가
 if __name__ == "__main__":
     # 입력 폴더와 출력 파일 경로 설정
-    input_folder = os.path.join(os.getcwd(), "korea_stocks_data_parts")
+    from data_snapshots import current_generation
+    input_folder = current_generation(os.path.join(os.getcwd(), "korea_stocks_data_parts"))
     output_path = os.path.join(os.getcwd(), "korea_analysis_combined.csv")
     
-    # 함수 호출: 분석 실행 및 CSV 저장
-    analyze_stocks_with_combined_logic(input_folder, output_path)
+    # 함수 호출: 분석 실행 및 CSV 저장 (--streaming: 대규모 종목용 일정 메모리 모드)
+    if "--streaming" in sys.argv:
+        analyze_stocks_streaming(input_folder, output_path)
+    else:
+        analyze_stocks_with_combined_logic(input_folder, output_path)
     print(f"Analysis completed. Results saved to {output_path}")
\ No newline at end of file
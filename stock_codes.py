@@ -65,3 +65,27 @@ stock_codes = {
     "196170.KQ": "알테오젠",
     "036460.KS": "한국가스공사",  # 수정
 }
+
+
+def load_stock_codes(path=None):
+    """
+    종목 목록을 파일에서 읽어 {종목코드: 종목명} 형태로 반환합니다.
+    파일 경로를 주지 않으면 환경변수 STOCK_UNIVERSE_FILE 을 사용하고, 둘 다 없으면 위의 기본 목록을 반환합니다.
+    지원 형식:
+        - CSV: code,name[,market] 헤더 (예: 005930.KS,삼성전자,KOSPI)
+        - JSON: {"005930.KS": "삼성전자", ...}
+    """
+    import os
+    import csv
+    import json
+
+    path = path or os.environ.get("STOCK_UNIVERSE_FILE")
+    if not path:
+        return dict(stock_codes)
+
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return dict(json.load(f))
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return {row["code"].strip(): row["name"].strip() for row in csv.DictReader(f) if row.get("code")}
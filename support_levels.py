@@ -0,0 +1,81 @@
+"""
+지지/저항선 계산에 쓰는 순수 파이썬 헬퍼 (pandas 없이 동작).
+"""
+from collections import deque
+
+
+def detect_multi_scale_extrema(data, windows=(10, 20, 60, 120)):
+    """
+    여러 윈도우 크기의 중심 윈도우 극값(고점/저점)을 한 번의 순회로 탐지합니다.
+    윈도우마다 단조 덱(monotonic deque)을 유지하므로 전체 비용은 O(n × 윈도우 수)입니다.
+    Args:
+        data (pd.DataFrame | dict): 종목 데이터 (Date, Close 포함, 날짜순 정렬)
+        windows (tuple): 탐지할 윈도우 크기 목록
+    Returns:
+        dict: {윈도우: (supports, resistances)} - 각각 [(가격, 날짜), ...] 형태
+    """
+    closes = list(data['Close'])
+    dates = list(data['Date'])
+
+    max_queues = {window: deque() for window in windows}
+    min_queues = {window: deque() for window in windows}
+    extrema = {window: ([], []) for window in windows}
+
+    for j, price in enumerate(closes):
+        for window in windows:
+            max_queue, min_queue = max_queues[window], min_queues[window]
+
+            # 덱 뒤쪽에서 현재 가격보다 의미 없는 인덱스 제거
+            while max_queue and closes[max_queue[-1]] <= price:
+                max_queue.pop()
+            max_queue.append(j)
+            while min_queue and closes[min_queue[-1]] >= price:
+                min_queue.pop()
+            min_queue.append(j)
+
+            # j 에서 끝나는 윈도우의 중심 i
+            # rolling(center=True) 는 [i - window // 2, i + (window - 1) // 2] 를 사용하므로
+            # 짝수 윈도우에서는 중심 왼쪽이 한 칸 더 김
+            i = j - (window - 1) // 2
+            start = i - window // 2
+            if start < 0:
+                continue
+
+            # 윈도우를 벗어난 인덱스 제거
+            while max_queue[0] < start:
+                max_queue.popleft()
+            while min_queue[0] < start:
+                min_queue.popleft()
+
+            supports, resistances = extrema[window]
+            if closes[i] == closes[min_queue[0]]:
+                supports.append((closes[i], dates[i]))
+            if closes[i] == closes[max_queue[0]]:
+                resistances.append((closes[i], dates[i]))
+
+    return extrema
+
+
+def cluster_levels(points, tolerance_percentage=1.5):
+    """
+    가까운 가격의 터닝포인트를 하나의 레벨로 묶습니다 (가격 정렬 후 한 번 순회, O(n log n)).
+    Args:
+        points (list): [(가격, 날짜), ...] 형태의 터닝포인트 목록
+        tolerance_percentage (float): 클러스터 최저가 대비 같은 레벨로 볼 최대 차이 비율
+    Returns:
+        list: [(평균 가격, 터치 횟수, 마지막 터치 날짜), ...] 가격 오름차순
+    """
+    levels = []
+    cluster = None
+    for price, date in sorted(points, key=lambda x: x[0]):
+        if cluster and price <= cluster['low'] * (1 + tolerance_percentage / 100):
+            cluster['total'] += price
+            cluster['touches'] += 1
+            cluster['last_date'] = max(cluster['last_date'], date)
+        else:
+            if cluster:
+                levels.append((cluster['total'] / cluster['touches'], cluster['touches'], cluster['last_date']))
+            cluster = {'low': price, 'total': price, 'touches': 1, 'last_date': date}
+    if cluster:
+        levels.append((cluster['total'] / cluster['touches'], cluster['touches'], cluster['last_date']))
+    return levels
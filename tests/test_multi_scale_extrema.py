@@ -0,0 +1,66 @@
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from support_levels import detect_multi_scale_extrema, cluster_levels
+
+WINDOWS = (2, 3, 4, 5, 10, 11, 20)
+
+
+def make_series(n=300, seed=7):
+    rng = random.Random(seed)
+    price = 10000.0
+    closes = []
+    for _ in range(n):
+        # 같은 가격이 반복되는 구간도 나오도록 정수로 반올림
+        price = max(100.0, price + rng.randint(-300, 300))
+        closes.append(float(round(price, -2)))
+    return {"Close": closes, "Date": list(range(n))}
+
+
+def brute_force_extrema(closes, window):
+    """
+    rolling(window, center=True) 와 같은 창 [i - window // 2, i + (window - 1) // 2] 의 극값
+    """
+    supports, resistances = [], []
+    for i in range(len(closes)):
+        start, end = i - window // 2, i + (window - 1) // 2
+        if start < 0 or end >= len(closes):
+            continue
+        values = closes[start:end + 1]
+        if closes[i] == min(values):
+            supports.append((closes[i], i))
+        if closes[i] == max(values):
+            resistances.append((closes[i], i))
+    return supports, resistances
+
+
+@pytest.mark.parametrize("window", WINDOWS)
+def test_matches_centered_window_reference(window):
+    data = make_series()
+    extrema = detect_multi_scale_extrema(data, windows=(window,))
+    assert extrema[window] == brute_force_extrema(data["Close"], window)
+
+
+def test_matches_pandas_rolling_center():
+    pd = pytest.importorskip("pandas")
+    data = make_series()
+    frame = pd.DataFrame(data)
+    extrema = detect_multi_scale_extrema(frame, windows=WINDOWS)
+
+    for window in WINDOWS:
+        rolling = frame['Close'].rolling(window=window, center=True)
+        supports = frame[frame['Close'] == rolling.min()]
+        resistances = frame[frame['Close'] == rolling.max()]
+        assert extrema[window][0] == list(zip(supports['Close'], supports['Date']))
+        assert extrema[window][1] == list(zip(resistances['Close'], resistances['Date']))
+
+
+def test_cluster_levels_groups_within_tolerance():
+    points = [(100.0, 1), (101.0, 3), (110.0, 2), (100.5, 5)]
+    levels = cluster_levels(points, tolerance_percentage=1.5)
+    assert levels == [(100.5, 3, 5), (110.0, 1, 2)]